@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Parallel date-range backfill for a Hive/Impala ETL script.
+
+Replaces one ``run_hive.sh <sql_file> <dt>`` per day with a runner that
+executes the partitions of a date range concurrently (``--parallelism``
+workers). Each worker keeps one long-lived CLI session and feeds it
+``set hivevar:dt=...; source <sql_file>;`` per partition, so the JVM/session
+start-up is paid once per worker instead of once per day.
+
+Failed partitions are retried (``--retries``); a crashed session is restarted
+before the next attempt. Finished dates are recorded in a checkpoint file so a
+rerun of the same command skips them. Per-partition wall time, attempts and
+status are written to a JSON summary; on a resumed run the records of dates
+finished earlier are taken from the checkpoint (``"from_checkpoint": true``).
+
+Usage:
+    python scripts/backfill_hive.py <sql_file> <start_dt> <end_dt> [--parallelism 4]
+        [--session hive|beeline|impala|cli] [--retries 2] [--checkpoint FILE] [--summary FILE]
+
+Executables come from HIVE_BIN / BEELINE_BIN / IMPALA_SHELL_BIN (defaults:
+hive, beeline, impala-shell), so a local fake ``hive`` is enough to exercise
+scheduling and resume (tests/fakes/hive, used by tests/test_backfill_hive.py). ``--session cli`` runs ``hive -f`` per
+partition exactly like run_hive.sh.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import queue
+import re
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+from dw_config import REPO_ROOT
+
+SESSIONS = ("hive", "beeline", "impala", "cli")
+DEFAULT_PARALLELISM = 4
+DEFAULT_RETRIES = 2
+
+# Lines that mean the statement batch failed even though the session lives on.
+_ERROR_RE = re.compile(r"^(FAILED:|Error:|ERROR:|ERROR :|Query aborted|Could not execute command)")
+
+
+def date_range(start: str, end: str) -> List[str]:
+    first = datetime.date.fromisoformat(start)
+    last = datetime.date.fromisoformat(end)
+    if last < first:
+        raise ValueError(f"end date {end} is before start date {start}")
+    return [(first + datetime.timedelta(days=i)).isoformat() for i in range((last - first).days + 1)]
+
+
+class PartitionFailed(Exception):
+    pass
+
+
+class CliSession:
+    """One ``hive -f`` process per partition (the run_hive.sh behaviour)."""
+
+    def __init__(self, sql_file: str, log) -> None:
+        self.sql_file = sql_file
+        self.log = log
+        self.bin = os.environ.get("HIVE_BIN", "hive")
+
+    def run(self, dt: str, sql_file: Optional[str] = None) -> None:
+        proc = subprocess.run(
+            [self.bin, "-f", sql_file or self.sql_file, "-hivevar", f"dt={dt}"],
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+        )
+        self.log(dt, proc.stdout)
+        if proc.returncode != 0:
+            raise PartitionFailed(f"exit code {proc.returncode}")
+
+    def close(self) -> None:
+        pass
+
+
+class InteractiveSession:
+    """A long-lived hive / beeline / impala-shell process fed over stdin.
+
+    After the script of each partition a marker is echoed through the shell
+    escape of the CLI; everything up to the marker is that partition's output.
+    """
+
+    COMMANDS = {
+        "hive": ("HIVE_BIN", "hive", ["-S"], "set hivevar:dt={dt};\nsource {sql};\n!echo {marker};\n"),
+        "beeline": ("BEELINE_BIN", "beeline", ["--silent=true", "--showHeader=false"],
+                    "set hivevar:dt={dt};\n!run {sql}\n!sh echo {marker}\n"),
+        "impala": ("IMPALA_SHELL_BIN", "impala-shell", ["--quiet"],
+                   "set var:dt={dt};\nsource {sql};\nshell echo {marker};\n"),
+    }
+
+    def __init__(self, kind: str, sql_file: str, log, extra_args: Sequence[str] = ()) -> None:
+        env_var, default_bin, args, self.template = self.COMMANDS[kind]
+        self.argv = [os.environ.get(env_var, default_bin), *args, *extra_args]
+        self.sql_file = sql_file
+        self.log = log
+        self.proc: Optional[subprocess.Popen] = None
+        self.seq = 0
+
+    def _ensure_started(self) -> subprocess.Popen:
+        if self.proc is None or self.proc.poll() is not None:
+            self.proc = subprocess.Popen(
+                self.argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                text=True, bufsize=1,
+            )
+        return self.proc
+
+    def run(self, dt: str, sql_file: Optional[str] = None) -> None:
+        """Run the script (``sql_file`` overrides the session default) for ``dt``."""
+        proc = self._ensure_started()
+        self.seq += 1
+        marker = f"__BACKFILL_DONE_{os.getpid()}_{self.seq}__"
+        try:
+            proc.stdin.write(self.template.format(dt=dt, sql=sql_file or self.sql_file, marker=marker))
+            proc.stdin.flush()
+        except BrokenPipeError:
+            self.close()
+            raise PartitionFailed("session exited before the script was sent")
+        output, failed = [], False
+        for line in proc.stdout:
+            if line.strip() == marker:
+                break
+            output.append(line)
+            failed = failed or bool(_ERROR_RE.match(line.strip()))
+        else:
+            self.log(dt, "".join(output))
+            self.close()
+            raise PartitionFailed(f"session exited (code {proc.wait()})")
+        self.log(dt, "".join(output))
+        if failed:
+            raise PartitionFailed("error reported by the session")
+
+    def close(self) -> None:
+        if self.proc is not None:
+            try:
+                if self.proc.poll() is None:
+                    self.proc.stdin.close()
+                    self.proc.wait(timeout=30)
+            except (OSError, subprocess.TimeoutExpired):
+                self.proc.kill()
+            self.proc = None
+
+
+class Checkpoint:
+    """JSON file of finished dates, rewritten atomically after each partition."""
+
+    def __init__(self, path: str, sql_file: str) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self.data = {"sql_file": sql_file, "done": {}}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.data = json.load(f)
+            if self.data.get("sql_file") != sql_file:
+                raise ValueError(f"checkpoint {path} belongs to {self.data.get('sql_file')}, not {sql_file}")
+
+    def is_done(self, dt: str) -> bool:
+        return dt in self.data["done"]
+
+    def record(self, dt: str) -> Dict:
+        return dict(self.data["done"][dt])
+
+    def mark_done(self, dt: str, record: Dict) -> None:
+        with self.lock:
+            self.data["done"][dt] = record
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2, sort_keys=True)
+            os.replace(tmp, self.path)
+
+
+class BackfillRunner:
+    def __init__(
+        self,
+        sql_file: str,
+        dates: Sequence[str],
+        parallelism: int = DEFAULT_PARALLELISM,
+        retries: int = DEFAULT_RETRIES,
+        session: str = "hive",
+        session_args: Sequence[str] = (),
+        checkpoint: Optional[str] = None,
+        log_dir: Optional[str] = None,
+    ) -> None:
+        self.sql_file = os.path.abspath(sql_file)
+        self.dates = list(dates)
+        self.parallelism = max(1, parallelism)
+        self.retries = retries
+        self.session = session
+        self.session_args = list(session_args)
+        name = os.path.splitext(os.path.basename(sql_file))[0]
+        base = os.path.join(REPO_ROOT, ".cache", "backfill")
+        self.checkpoint = Checkpoint(
+            checkpoint or os.path.join(base, f"{name}_{self.dates[0]}_{self.dates[-1]}.json"), self.sql_file
+        )
+        self.log_dir = log_dir or os.path.join(base, "logs", name)
+        os.makedirs(os.path.dirname(os.path.abspath(self.checkpoint.path)), exist_ok=True)
+        os.makedirs(self.log_dir, exist_ok=True)
+        self.results: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def _log(self, dt: str, text: str) -> None:
+        with open(os.path.join(self.log_dir, f"{dt}.log"), "a", encoding="utf-8") as f:
+            f.write(text)
+
+    def _new_session(self):
+        if self.session == "cli":
+            return CliSession(self.sql_file, self._log)
+        return InteractiveSession(self.session, self.sql_file, self._log, self.session_args)
+
+    def _worker(self, worker_id: int, pending: "queue.Queue") -> None:
+        session = self._new_session()
+        try:
+            while True:
+                try:
+                    dt, attempt = pending.get_nowait()
+                except queue.Empty:
+                    return
+                started = time.monotonic()
+                error = None
+                try:
+                    session.run(dt)
+                except (PartitionFailed, OSError) as e:
+                    error = str(e)
+                elapsed = round(time.monotonic() - started, 3)
+                record = {"status": "ok" if error is None else "failed", "attempts": attempt,
+                          "seconds": elapsed, "worker": worker_id}
+                if error is not None:
+                    record["error"] = error
+                    print(f"[{dt}] attempt {attempt} failed after {elapsed}s: {error}", file=sys.stderr)
+                    if attempt <= self.retries:
+                        pending.put((dt, attempt + 1))
+                        continue
+                else:
+                    print(f"[{dt}] done in {elapsed}s (attempt {attempt}, worker {worker_id})", file=sys.stderr)
+                    self.checkpoint.mark_done(dt, record)
+                with self._lock:
+                    self.results[dt] = record
+        finally:
+            session.close()
+
+    def run(self) -> Dict:
+        started = time.monotonic()
+        skipped = [dt for dt in self.dates if self.checkpoint.is_done(dt)]
+        pending: "queue.Queue" = queue.Queue()
+        for dt in self.dates:
+            if not self.checkpoint.is_done(dt):
+                pending.put((dt, 1))
+        workers = [
+            threading.Thread(target=self._worker, args=(i, pending), daemon=True)
+            for i in range(min(self.parallelism, pending.qsize()))
+        ]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        failed = sorted(dt for dt, r in self.results.items() if r["status"] != "ok")
+        partitions = {dt: dict(self.checkpoint.record(dt), from_checkpoint=True) for dt in skipped}
+        partitions.update(self.results)
+        return {
+            "sql_file": self.sql_file,
+            "session": self.session,
+            "parallelism": self.parallelism,
+            "dates": len(self.dates),
+            "skipped_from_checkpoint": skipped,
+            "succeeded": sum(1 for r in self.results.values() if r["status"] == "ok"),
+            "failed": failed,
+            "wall_seconds": round(time.monotonic() - started, 3),
+            "partitions": dict(sorted(partitions.items())),
+            "checkpoint": self.checkpoint.path,
+        }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Parallel date-range backfill for Hive/Impala scripts")
+    parser.add_argument("sql_file")
+    parser.add_argument("start_dt", help="YYYY-MM-DD")
+    parser.add_argument("end_dt", help="YYYY-MM-DD (inclusive)")
+    parser.add_argument("--parallelism", type=int, default=DEFAULT_PARALLELISM)
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="extra attempts per partition")
+    parser.add_argument("--session", choices=SESSIONS, default="hive")
+    parser.add_argument("--session-arg", action="append", default=[],
+                        help="extra CLI argument, e.g. --session-arg=-u --session-arg=jdbc:hive2://...")
+    parser.add_argument("--checkpoint", help="checkpoint file (default under .cache/backfill)")
+    parser.add_argument("--summary", help="write the JSON summary here as well as stdout")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.sql_file):
+        parser.error(f"{args.sql_file} not found")
+    runner = BackfillRunner(
+        args.sql_file,
+        date_range(args.start_dt, args.end_dt),
+        parallelism=args.parallelism,
+        retries=args.retries,
+        session=args.session,
+        session_args=args.session_arg,
+        checkpoint=args.checkpoint,
+    )
+    summary = runner.run()
+    text = json.dumps(summary, ensure_ascii=False, indent=2)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
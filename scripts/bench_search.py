@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Recall and latency benchmark for metadata search over a synthetic metastore.
+
+Generates a reproducible loan-domain metastore export (seeded, ods/dwd/dws/dm
+layers, realistic Chinese column comments) at each requested size, loads it
+into a metadata snapshot and measures four search paths against the success
+criteria of the smart search orchestration design:
+
+    search_table           English keyword LIKE on table names
+    search_by_comment      raw business term, single LIKE (today's behaviour)
+    orchestrated_like      synonym-expanded term, up to 4 LIKE calls merged (S1-S6)
+    search_by_comment_v2   synonym-expanded term, one indexed call
+
+For every path and query it reports, against planted ground truth:
+
+    precision@k   share of the top k results that are gold tables
+    recall        share of all gold tables found, from one untimed call with
+                  the result limit raised to ``--recall-limit``
+    p50/p95_ms    latency over ``--repeat`` timed calls (p99 too when
+                  ``--repeat`` is at least 100; below that it is just the max)
+
+plus snapshot/index build time and peak RSS per size. Each size runs in a
+fresh process, so ``peak_rss_mb`` is that size's own high-water mark.
+Results are saved as JSON; ``--baseline`` compares against a previous run and
+exits 1 if any precision or recall regressed.
+
+Usage:
+    python scripts/bench_search.py [--sizes 10000,100000,1000000] [--repeat 20] [--recall-limit 5000]
+        [--output .cache/bench/search_bench.json] [--baseline previous.json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Set
+
+from dw_config import REPO_ROOT
+from metadata_index import (
+    DEFAULT_SYNONYM_PATH,
+    EXPORT_FIELDS,
+    LAYER_WEIGHTS,
+    LOW_DISCRIMINATION_TERMS,
+    decompose,
+    detect_layer,
+    expand_terms,
+    load_synonyms,
+)
+from metadata_snapshot import MetadataSnapshot
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+DEFAULT_REPEAT = 20
+DEFAULT_K = (5, 10)
+DEFAULT_RECALL_LIMIT = 5000
+P99_MIN_REPEAT = 100
+DEFAULT_OUTPUT = os.path.join(REPO_ROOT, ".cache", "bench", "search_bench.json")
+MAX_ORCHESTRATED_CALLS = 4
+SEED = 20260303
+
+# Subset of references/synonym.yaml used when the dictionary is not checked out,
+# so results stay comparable across machines.
+BENCH_SYNONYMS = {
+    "首逾": ["M1逾期", "首次逾期", "首期逾期", "首逾", "first_overdue"],
+    "下款": ["放款", "下款", "出款", "发放", "loan", "disburse"],
+    "过件": ["审批通过", "批核通过", "授信成功", "授信通过"],
+    "过件率": ["审批通过率", "批核率", "授信通过率", "通过率", "approval_rate"],
+    "金额": ["金额", "余额", "总额", "合计", "amount", "amt", "balance"],
+    "放款金额": ["放款金额", "放款本金", "发放金额", "支用金额", "loan_amount"],
+}
+
+# Design doc success criteria: query -> (English table keyword, gold comment phrases).
+QUERIES = {
+    "首逾金额": ("overdue", ("M1逾期金额", "首次逾期金额", "首期逾期金额")),
+    "下款": ("loan", ("放款金额", "放款笔数", "放款入账金额")),
+    "过件率": ("approve", ("审批通过率", "授信通过率")),
+    "放款金额": ("loan", ("放款金额",)),
+}
+
+TOPICS = {
+    # topic: (weight, table name stem, table comment, topic-specific column comments)
+    "overdue": (5, "overdue", "逾期", ["M1逾期金额", "首次逾期金额", "逾期天数", "逾期本金", "M2逾期余额", "M3逾期余额"]),
+    "loan": (15, "loan", "放款", ["放款金额", "放款笔数", "放款入账金额", "支用金额", "放款入账时间"]),
+    "approve": (5, "approve", "审批", ["审批通过率", "授信通过率", "审批拒绝笔数", "授信额度", "审批时间"]),
+    "apply": (15, "apply", "进件申请", ["申请金额", "进件笔数", "申请时间", "申请渠道"]),
+    "repay": (20, "repay", "还款", ["还款金额", "实还本金", "应还利息", "提前还款金额", "结清标志"]),
+    "collection": (10, "collection", "催收", ["催收笔数", "催回金额", "电催次数", "委外催收金额"]),
+    "customer": (30, "cust", "客户", ["客户编号", "客户姓名", "证件号码", "手机号", "客户等级"]),
+}
+COMMON_COMMENTS = ["统计日期", "数据日期", "机构编码", "渠道编码", "产品类型", "创建时间", "更新时间",
+                   "合计金额", "余额", "笔数", "备注", "状态"]
+LAYERS = [("ods", 0.35), ("dwd", 0.3), ("dws", 0.2), ("dm", 0.15)]
+
+
+def generate_export(path: str, columns: int, seed: int = SEED) -> Dict[str, Set[str]]:
+    """Write a synthetic export TSV with ~``columns`` rows; return gold tables per query."""
+    rng = random.Random(seed)
+    topic_names = list(TOPICS)
+    topic_weights = [TOPICS[t][0] for t in topic_names]
+    layer_names = [l for l, _ in LAYERS]
+    layer_weights = [w for _, w in LAYERS]
+    gold: Dict[str, Set[str]] = {q: set() for q in QUERIES}
+    written = 0
+    table_no = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\t".join(EXPORT_FIELDS) + "\n")
+        while written < columns:
+            table_no += 1
+            topic = rng.choices(topic_names, topic_weights)[0]
+            layer = rng.choices(layer_names, layer_weights)[0]
+            _, stem, topic_comment, vocab = TOPICS[topic]
+            db = f"ph_sac_{layer}"
+            table = f"{layer}_sac_{stem}_{table_no:07d}"
+            table_comment = f"{topic_comment}{rng.choice(['明细', '日汇总', '月汇总', '宽表'])}"
+            n = min(rng.randint(15, 60), columns - written)
+            comments = [rng.choice(vocab) if rng.random() < 0.4 else rng.choice(COMMON_COMMENTS) for _ in range(n)]
+            for i, comment in enumerate(comments):
+                f.write(f"{db}\t{table}\t{table_comment}\tcol_{i:03d}\tstring\t{comment}\n")
+            full = f"{db}.{table}"
+            for query, (_, phrases) in QUERIES.items():
+                if any(p in c for p in phrases for c in comments):
+                    gold[query].add(full)
+            written += n
+    return gold
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1)))))
+    return round(ordered[rank], 3)
+
+
+def rank_tables(hits: Dict[str, Set[str]]) -> List[str]:
+    """Multi-route hits first, then dm/da > dws > dwd > ods (design step S5)."""
+    def key(name: str):
+        db, _, table = name.partition(".")
+        routes = len(hits[name] - LOW_DISCRIMINATION_TERMS) or 1
+        return (-routes, -LAYER_WEIGHTS.get(detect_layer(db, table), 0), name)
+    return sorted(hits, key=key)
+
+
+def select_discriminative(query: str, synonyms: Dict[str, List[str]], limit: int) -> List[str]:
+    """Pick the search terms for S4: dictionary terms of the specific units, raw term last.
+
+    Units such as "金额" are skipped entirely, matching the design's rule of
+    not searching low-discrimination words on their own.
+    """
+    units = [query] if query in synonyms else decompose(query, synonyms)
+    picked: List[str] = []
+    for unit in units:
+        if unit in LOW_DISCRIMINATION_TERMS:
+            continue
+        picked.extend(t for t in synonyms.get(unit, [unit]) if t != query)
+    picked = list(dict.fromkeys(picked))
+    return picked[:limit - 1] + [query]
+
+
+class SearchPaths:
+    def __init__(self, snapshot: MetadataSnapshot, synonyms: Dict[str, List[str]], limit: int) -> None:
+        self.snapshot = snapshot
+        self.synonyms = synonyms
+        self.limit = limit
+
+    def search_table(self, query: str) -> List[str]:
+        keyword = QUERIES[query][0]
+        rows = self.snapshot.search_table(keyword, self.limit)["results"]
+        return [f"{r['db_name']}.{r['table_name']}" for r in rows]
+
+    def search_by_comment(self, query: str) -> List[str]:
+        rows = self.snapshot.search_by_comment(query, "all", self.limit * 10)["results"]
+        return list(dict.fromkeys(f"{r['db_name']}.{r['table_name']}" for r in rows))
+
+    def orchestrated_like(self, query: str) -> List[str]:
+        terms = select_discriminative(query, self.synonyms, MAX_ORCHESTRATED_CALLS)
+        hits: Dict[str, Set[str]] = {}
+        for term in terms:
+            for r in self.snapshot.search_by_comment(term, "all", self.limit * 10)["results"]:
+                hits.setdefault(f"{r['db_name']}.{r['table_name']}", set()).add(term)
+        return rank_tables(hits)
+
+    def search_by_comment_v2(self, query: str) -> List[str]:
+        terms = expand_terms(query, self.synonyms)
+        return [f"{r['db_name']}.{r['table_name']}"
+                for r in self.snapshot.search_by_comment_v2(terms, "all", self.limit)["results"]]
+
+
+PATHS = ("search_table", "search_by_comment", "orchestrated_like", "search_by_comment_v2")
+
+
+def precision_at(results: Sequence[str], gold: Set[str], k: int) -> Optional[float]:
+    if not gold:
+        return None
+    return round(len(set(results[:k]) & gold) / k, 3)
+
+
+def recall(results: Sequence[str], gold: Set[str]) -> Optional[float]:
+    if not gold:
+        return None
+    return round(len(set(results) & gold) / len(gold), 3)
+
+
+def peak_rss_mb() -> float:
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def bench_size(columns: int, synonyms: Dict[str, List[str]], repeat: int, ks: Sequence[int], workdir: str,
+               recall_limit: int = DEFAULT_RECALL_LIMIT) -> Dict:
+    export = os.path.join(workdir, f"metastore_{columns}.tsv")
+    t0 = time.perf_counter()
+    gold = generate_export(export, columns)
+    generated = time.perf_counter()
+    snapshot = MetadataSnapshot(os.path.join(workdir, f"snapshot_{columns}.db"))
+    snapshot.import_export(export)
+    imported = time.perf_counter()
+    snapshot.comment_index()
+    indexed = time.perf_counter()
+
+    paths = SearchPaths(snapshot, synonyms, max(ks))
+    full = SearchPaths(snapshot, synonyms, recall_limit)
+    results: Dict[str, Dict] = {}
+    for path in PATHS:
+        search = getattr(paths, path)
+        per_query = {}
+        for query in QUERIES:
+            timings = []
+            found: List[str] = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                found = search(query)
+                timings.append((time.perf_counter() - start) * 1000)
+            per_query[query] = {
+                "hits": len(found),
+                **{f"precision@{k}": precision_at(found, gold[query], k) for k in ks},
+                "recall": recall(getattr(full, path)(query), gold[query]),
+                "p50_ms": percentile(timings, 50),
+                "p95_ms": percentile(timings, 95),
+            }
+            if repeat >= P99_MIN_REPEAT:
+                per_query[query]["p99_ms"] = percentile(timings, 99)
+        results[path] = per_query
+    snapshot.close()
+    return {
+        "columns": columns,
+        "tables": snapshot_tables(export),
+        "gold_tables": {q: len(g) for q, g in gold.items()},
+        "generate_seconds": round(generated - t0, 2),
+        "snapshot_import_seconds": round(imported - generated, 2),
+        "index_build_seconds": round(indexed - imported, 2),
+        "peak_rss_mb": peak_rss_mb(),
+        "paths": results,
+    }
+
+
+def snapshot_tables(export: str) -> int:
+    with open(export, encoding="utf-8") as f:
+        next(f)
+        return len({line.split("\t", 2)[1] for line in f})
+
+
+def compare(current: Dict, baseline: Dict) -> List[str]:
+    """Return precision/recall regressions of ``current`` against ``baseline``."""
+    regressions = []
+    old_sizes = {r["columns"]: r for r in baseline.get("sizes", [])}
+    for size in current["sizes"]:
+        old = old_sizes.get(size["columns"])
+        if not old:
+            continue
+        for path, queries in size["paths"].items():
+            for query, metrics in queries.items():
+                before = old["paths"].get(path, {}).get(query)
+                if not before:
+                    continue
+                for name, value in metrics.items():
+                    if (name.startswith("precision@") or name == "recall") and value is not None \
+                            and (before.get(name) or 0) > value:
+                        regressions.append(f"{size['columns']} {path} {query} {name}: {before[name]} -> {value}")
+                print(f"{size['columns']:>8} {path:<22} {query:<6} p95 {before['p95_ms']:>9}ms -> "
+                      f"{metrics['p95_ms']:>9}ms", file=sys.stderr)
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Search recall/latency benchmark on a synthetic metastore")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="comma-separated column counts")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--k", default=",".join(str(k) for k in DEFAULT_K), help="precision cut-offs")
+    parser.add_argument("--recall-limit", type=int, default=DEFAULT_RECALL_LIMIT,
+                        help="result limit of the untimed recall call (must exceed the gold set sizes)")
+    parser.add_argument("--synonyms", default=DEFAULT_SYNONYM_PATH,
+                        help="synonym.yaml (built-in subset when missing)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", help="previous result JSON to compare against")
+    parser.add_argument("--workdir", help="keep generated fixtures here instead of a temp dir")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    ks = [int(k) for k in args.k.split(",") if k]
+    synonyms = load_synonyms(args.synonyms) or BENCH_SYNONYMS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        report = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seed": SEED,
+            "repeat": args.repeat,
+            "recall_limit": args.recall_limit,
+            "synonyms": "synonym.yaml" if synonyms is not BENCH_SYNONYMS else "built-in",
+            "sizes": [],
+        }
+        for columns in sizes:
+            print(f"benchmarking {columns} columns ...", file=sys.stderr)
+            # a fresh process per size keeps peak_rss_mb from carrying over between sizes
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                result = pool.submit(bench_size, columns, synonyms, args.repeat, ks, workdir, args.recall_limit)
+                report["sizes"].append(result.result())
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f))
+        for line in regressions:
+            print(f"REGRESSION: {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Stream a Hive partition, query result or TSV file into Doris via Stream Load.
+
+Rows are read line by line and cut into chunks of at most ``--chunk-mb``;
+up to ``--parallel`` chunks are in flight at once, so memory stays bounded at
+roughly (parallel + 1) x chunk size regardless of the source volume. Each
+chunk is PUT to ``http://<fe_host>:<fe_http_port>/api/<db>/<table>/_stream_load``
+(following the FE -> BE redirect) under the label
+``<prefix>_<chunk index>_<content hash>``: a retry or rerun of the same chunk
+is deduplicated by Doris, while new content under the same source name gets
+new labels and is loaded. Hive sources are read ``ORDER BY`` the key columns
+of the target (``--order-by`` overrides), so a rerun cuts the same chunks;
+for DUPLICATE tables whose key is not unique, pass a unique ``--order-by``.
+
+``--hive-partition`` reads ``SELECT *``, which Hive returns as the data
+columns followed by the partition columns (``..., dt``). Stream Load maps
+fields by position, so ``--columns`` is required there: list the target
+column names in that source order, e.g. ``category_id,amount,dt`` for a
+target declared as ``(dt, category_id, amount)``.
+
+Label handling follows the key model of the target table (read from
+sql/doris/ddl/, or ``--model``):
+
+    UNIQUE               chunks commit independently; a re-delivered row only
+                         overwrites itself, so partial loads are safe to rerun.
+    AGGREGATE/DUPLICATE  re-delivered rows would double count, so chunks use
+                         two-phase commit: every chunk is pre-committed, then
+                         the transactions are committed, or all are aborted if
+                         any chunk fails. If a commit itself fails, the
+                         remaining transactions are aborted and the summary
+                         reports ``partial_commit``; a rerun skips the
+                         committed chunks by label and loads the rest.
+
+Usage:
+    python scripts/doris_stream_load.py <db.table> --hive-partition ph_sac_dws.t/dt=2026-03-01 --columns c1,c2,dt
+    python scripts/doris_stream_load.py <db.table> --query "select ..." [--label-prefix p]
+    python scripts/doris_stream_load.py <db.table> --file rows.tsv
+
+Connection settings come from the ``doris`` section of config/connections.yaml;
+``--fe-url`` overrides host/port (e.g. a local stand-in server).
+"""
+
+import argparse
+import base64
+import glob
+import hashlib
+import http.client
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from dw_config import REPO_ROOT, engine_config
+
+DEFAULT_CHUNK_MB = 64
+DEFAULT_PARALLEL = 4
+DEFAULT_RETRIES = 3
+MODELS = ("UNIQUE", "AGGREGATE", "DUPLICATE")
+DDL_GLOB = os.path.join("sql", "doris", "ddl", "*.sql")
+_LABEL_RE = re.compile(r"[^-_A-Za-z0-9:]")
+
+
+class StreamLoadError(Exception):
+    pass
+
+
+def table_keys(table: str, ddl_glob: str = DDL_GLOB) -> Optional[Tuple[str, List[str]]]:
+    """Return (model, key columns) for ``table`` from the Doris DDL in the tree."""
+    short = table.split(".")[-1].lower()
+    for path in glob.glob(os.path.join(REPO_ROOT, ddl_glob)):
+        text = open(path, encoding="utf-8").read()
+        for m in re.finditer(r"create\s+table\s+(?:if\s+not\s+exists\s+)?`?([\w.]+)`?\s*\((.*?);", text, re.I | re.S):
+            if m.group(1).split(".")[-1].lower() == short:
+                km = re.search(r"\b(unique|aggregate|duplicate)\s+key\s*\(([^)]*)\)", m.group(2), re.I)
+                if not km:
+                    return "DUPLICATE", []
+                return km.group(1).upper(), [k.strip(" `") for k in km.group(2).split(",") if k.strip()]
+    return None
+
+
+def source_sql(args, order_by: Sequence[str] = ()) -> str:
+    """The Hive statement for ``--hive-partition`` / ``--query``, ordered for stable chunks."""
+    if args.hive_partition:
+        table, _, spec = args.hive_partition.partition("/")
+        preds = " AND ".join(f"{k} = '{v}'" for k, v in (p.split("=", 1) for p in spec.split("/") if p))
+        sql = f"SELECT * FROM {table}" + (f" WHERE {preds}" if preds else "")
+    else:
+        sql = f"SELECT * FROM ({args.query.strip().rstrip(';')}) src" if order_by else args.query
+    if order_by:
+        sql += " ORDER BY " + ", ".join(order_by)
+    return sql
+
+
+def source_lines(args, order_by: Sequence[str] = ()) -> Iterator[bytes]:
+    """Yield TSV rows (bytes, newline-terminated) from the selected source."""
+    if args.file:
+        stream = sys.stdin.buffer if args.file == "-" else open(args.file, "rb")
+        with stream:
+            yield from stream
+        return
+    sql = source_sql(args, order_by)
+    if args.source_cli == "beeline":
+        argv = [os.environ.get("BEELINE_BIN", "beeline"), "--silent=true", "--showHeader=false",
+                "--outputformat=tsv2", *args.source_arg, "-e", sql]
+    else:
+        argv = [os.environ.get("HIVE_BIN", "hive"), "-S", "--hiveconf", "hive.cli.print.header=false",
+                *args.source_arg, "-e", sql]
+    null = args.null_string.encode()
+    proc = subprocess.Popen(argv, stdout=subprocess.PIPE)
+    try:
+        for line in proc.stdout:
+            if null and null in line:
+                line = b"\t".join(b"\\N" if f == null else f for f in line.rstrip(b"\n").split(b"\t")) + b"\n"
+            yield line
+    except GeneratorExit:
+        proc.kill()
+        proc.wait()
+        raise
+    if proc.wait() != 0:
+        raise StreamLoadError(f"source command exited with code {proc.returncode}")
+
+
+def chunked(lines: Iterable[bytes], chunk_bytes: int) -> Iterator[tuple]:
+    """Group lines into (payload, row_count) chunks of at most ``chunk_bytes``."""
+    buf: List[bytes] = []
+    size = 0
+    for line in lines:
+        if not line.endswith(b"\n"):
+            line += b"\n"
+        if buf and size + len(line) > chunk_bytes:
+            yield b"".join(buf), len(buf)
+            buf, size = [], 0
+        buf.append(line)
+        size += len(line)
+    if buf:
+        yield b"".join(buf), len(buf)
+
+
+class StreamLoader:
+    def __init__(self, fe_url: str, user: str, password: str, db: str, table: str, model: str,
+                 columns: Optional[str] = None, timeout: int = 600) -> None:
+        self.fe = urllib.parse.urlsplit(fe_url)
+        self.auth = "Basic " + base64.b64encode(f"{user}:{password}".encode()).decode()
+        self.db, self.table, self.model = db, table, model
+        self.columns = columns
+        self.timeout = timeout
+        self.two_phase = model != "UNIQUE"
+
+    def _request(self, path: str, headers: Dict[str, str], body: bytes = b"") -> Dict:
+        """PUT to the FE, following one redirect to the BE with the same body."""
+        url = urllib.parse.urlunsplit((self.fe.scheme or "http", self.fe.netloc, path, "", ""))
+        for _ in range(3):
+            parts = urllib.parse.urlsplit(url)
+            conn_cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+            conn = conn_cls(parts.netloc, timeout=self.timeout)
+            try:
+                conn.request("PUT", parts.path + (f"?{parts.query}" if parts.query else ""), body=body,
+                             headers={"Authorization": self.auth, "Content-Length": str(len(body)), **headers})
+                resp = conn.getresponse()
+                payload = resp.read()
+                if resp.status in (301, 302, 307, 308):
+                    url = resp.getheader("Location")
+                    continue
+                if resp.status != 200:
+                    raise StreamLoadError(f"HTTP {resp.status}: {payload[:500]!r}")
+                return json.loads(payload)
+            finally:
+                conn.close()
+        raise StreamLoadError("too many redirects")
+
+    def load_chunk(self, label: str, payload: bytes) -> Dict:
+        headers = {"label": label, "format": "csv", "column_separator": "\\x09"}
+        if self.columns:
+            headers["columns"] = self.columns
+        if self.two_phase:
+            headers["two_phase_commit"] = "true"
+        result = self._request(f"/api/{self.db}/{self.table}/_stream_load", headers, payload)
+        status = result.get("Status")
+        if status == "Success" or (status == "Publish Timeout" and not self.two_phase):
+            return result
+        if status == "Label Already Exists" and result.get("ExistingJobStatus") in ("FINISHED", "VISIBLE"):
+            result["already_loaded"] = True
+            return result
+        raise StreamLoadError(f"{label}: {status}: {result.get('Message')} {result.get('ErrorURL') or ''}".strip())
+
+    def finish_txn(self, txn_id: int, operation: str) -> Dict:
+        result = self._request(f"/api/{self.db}/_stream_load_2pc",
+                               {"txn_id": str(txn_id), "txn_operation": operation})
+        if str(result.get("status", result.get("Status", ""))).lower() != "success":
+            raise StreamLoadError(f"{operation} txn {txn_id}: {result}")
+        return result
+
+
+def run_load(loader: StreamLoader, chunks: Iterable[tuple], label_prefix: str, parallel: int, retries: int) -> Dict:
+    started = time.monotonic()
+    slots = threading.BoundedSemaphore(parallel + 1)
+    results: List[Dict] = []
+    lock = threading.Lock()
+
+    def send(index: int, payload: bytes, rows: int) -> Dict:
+        label = f"{label_prefix}_{index:06d}_{hashlib.sha1(payload).hexdigest()[:16]}"
+        try:
+            for attempt in range(1, retries + 2):
+                t0 = time.monotonic()
+                try:
+                    result = loader.load_chunk(label, payload)
+                    break
+                except (StreamLoadError, OSError) as e:
+                    if attempt > retries:
+                        raise
+                    print(f"[{label}] attempt {attempt} failed: {e}", file=sys.stderr)
+                    time.sleep(min(2 ** attempt, 30))
+            record = {"label": label, "rows": rows, "bytes": len(payload), "attempts": attempt,
+                      "seconds": round(time.monotonic() - t0, 3), "txn_id": result.get("TxnId"),
+                      "already_loaded": bool(result.get("already_loaded"))}
+            with lock:
+                results.append(record)
+            return record
+        finally:
+            slots.release()
+
+    futures: List[Future] = []
+    error: Optional[BaseException] = None
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        try:
+            for index, (payload, rows) in enumerate(chunks):
+                slots.acquire()
+                futures.append(executor.submit(send, index, payload, rows))
+                if any(f.done() and f.exception() for f in futures):
+                    break
+        except BaseException as e:
+            error = e
+        for f in futures:
+            if f.exception() is not None and error is None:
+                error = f.exception()
+
+    if hasattr(chunks, "close"):
+        chunks.close()  # stop the source command if submission stopped early
+
+    commit: Dict[str, List] = {}
+    if loader.two_phase:
+        pending = [r["txn_id"] for r in sorted(results, key=lambda r: r["label"])
+                   if r["txn_id"] and not r["already_loaded"]]
+        commit = {"committed": [], "aborted": [], "abort_failed": []}
+        to_abort = pending
+        if error is None:
+            for pos, txn_id in enumerate(pending):
+                try:
+                    loader.finish_txn(txn_id, "commit")
+                except (StreamLoadError, OSError) as e:
+                    error = StreamLoadError(f"commit of txn {txn_id} failed after {pos} of {len(pending)} "
+                                            f"committed: {e}")
+                    to_abort = pending[pos:]
+                    break
+                commit["committed"].append(txn_id)
+            else:
+                to_abort = []
+        for txn_id in to_abort:
+            try:
+                loader.finish_txn(txn_id, "abort")
+                commit["aborted"].append(txn_id)
+            except (StreamLoadError, OSError) as e:
+                commit["abort_failed"].append(txn_id)
+                print(f"WARNING: abort of txn {txn_id} failed: {e}", file=sys.stderr)
+
+    elapsed = time.monotonic() - started
+    loaded = [r for r in results if not r["already_loaded"]]
+    rows = sum(r["rows"] for r in loaded)
+    size = sum(r["bytes"] for r in loaded)
+    summary = {
+        "target": f"{loader.db}.{loader.table}",
+        "model": loader.model,
+        "two_phase_commit": loader.two_phase,
+        "ok": error is None,
+        "chunks": len(results),
+        "already_loaded_chunks": len(results) - len(loaded),
+        "rows": rows,
+        "bytes": size,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(rows / elapsed, 1) if elapsed else None,
+        "bytes_per_sec": round(size / elapsed, 1) if elapsed else None,
+        "chunk_results": sorted(results, key=lambda r: r["label"]),
+    }
+    if loader.two_phase:
+        summary["commit"] = commit
+        summary["partial_commit"] = bool(commit["committed"]) and error is not None
+    if error is not None:
+        summary["error"] = str(error)
+    return summary
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Parallel chunked Doris Stream Load")
+    parser.add_argument("target", help="doris db.table")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--hive-partition", help="db.table/dt=YYYY-MM-DD[/k=v...]")
+    source.add_argument("--query", help="Hive query whose result is loaded")
+    source.add_argument("--file", help="TSV file, '-' for stdin")
+    parser.add_argument("--source-cli", choices=("hive", "beeline"), default="hive")
+    parser.add_argument("--source-arg", action="append", default=[], help="extra argument for the source CLI")
+    parser.add_argument("--null-string", default="NULL", help="source NULL marker, sent as \\N")
+    parser.add_argument("--columns", help="Stream Load 'columns' header: target column per source field, "
+                                          "in source order (required with --hive-partition)")
+    parser.add_argument("--model", choices=MODELS, help="key model (default: from sql/doris/ddl)")
+    parser.add_argument("--order-by", help="comma-separated source columns that order Hive rows "
+                                           "(default: key columns of the target)")
+    parser.add_argument("--label-prefix", help="default: derived from target and source")
+    parser.add_argument("--chunk-mb", type=float, default=DEFAULT_CHUNK_MB)
+    parser.add_argument("--parallel", type=int, default=DEFAULT_PARALLEL)
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES)
+    parser.add_argument("--fe-url", help="override http://fe_host:fe_http_port")
+    parser.add_argument("--config", help="connections.yaml path")
+    args = parser.parse_args(argv)
+
+    db, _, table = args.target.partition(".")
+    if not table:
+        parser.error("target must be db.table")
+    if args.hive_partition and not args.columns:
+        parser.error("--hive-partition needs --columns: Hive returns the partition columns last "
+                     "(..., dt) and Stream Load maps fields by position")
+    ddl_model, keys = table_keys(table) or (None, [])
+    model = args.model or ddl_model
+    if model is None:
+        parser.error(f"no DDL for {table} under sql/doris/ddl; pass --model")
+    order_by = [c.strip() for c in args.order_by.split(",") if c.strip()] if args.order_by else keys
+    if not args.file and not order_by:
+        print("WARNING: no key columns to order the Hive source by; a rerun may cut different chunks. "
+              "Pass --order-by.", file=sys.stderr)
+    cfg = engine_config("doris", args.config)
+    fe_url = args.fe_url or f"http://{cfg['fe_host']}:{cfg.get('fe_http_port', 8030)}"
+    source_tag = args.hive_partition or args.file or hashlib.sha1(args.query.encode()).hexdigest()[:12]
+    prefix = _LABEL_RE.sub("_", args.label_prefix or f"{db}_{table}_{source_tag}")[:100]
+
+    loader = StreamLoader(fe_url, cfg["user"], cfg.get("password") or "", db, table, model, args.columns)
+    summary = run_load(loader, chunked(source_lines(args, order_by), int(args.chunk_mb * 1024 * 1024)),
+                       prefix, max(1, args.parallel), args.retries)
+    json.dump(summary, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+    return 0 if summary["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Shared loader for config/connections.yaml.
+
+Copy config/connections.yaml.example to config/connections.yaml and fill in the
+actual endpoints; the path can be overridden with DW_CONNECTIONS.
+"""
+
+import os
+from typing import Dict, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CONNECTIONS_PATH = os.path.join(REPO_ROOT, "config", "connections.yaml")
+
+
+def load_connections(path: Optional[str] = None) -> Dict[str, Dict]:
+    """Return the parsed connections config, keyed by engine name."""
+    path = path or os.environ.get("DW_CONNECTIONS") or DEFAULT_CONNECTIONS_PATH
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"{path} not found; copy config/connections.yaml.example and fill in actual values"
+        )
+    import yaml
+
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def engine_config(engine: str, path: Optional[str] = None) -> Dict:
+    """Return the config section of one engine (hive / impala / doris / ...)."""
+    config = load_connections(path)
+    if engine not in config:
+        raise KeyError(f"no '{engine}' section in connections config")
+    return config[engine] or {}
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Pooled, concurrent metadata queries against Hive, Impala and Doris.
+
+Each engine in config/connections.yaml gets a bounded connection pool whose
+sessions are kept alive between calls (validated with ``SELECT 1`` after
+``keepalive_seconds`` idle). Kerberos tickets are checked once and reused by
+every Hive/Impala session instead of per call.
+
+``describe_many`` / ``search_many`` / ``run_many`` run a list of lookups
+concurrently over those pools and return per-item results and timings, so
+describing 10 candidate tables costs about one round-trip on warm sessions.
+
+Usage:
+    python scripts/engine_pool.py describe hive ph_sac_dmm.t1 ph_sac_dwd.t2 ...
+    python scripts/engine_pool.py search hive ph_sac_dmm overdue loan ...
+
+Drivers (imported lazily, install only what you use):
+    hive   -> pyhive[hive]     impala -> impyla     doris -> pymysql
+"""
+
+import argparse
+import json
+import queue
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Sequence
+
+import tracing
+from dw_config import load_connections
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_KEEPALIVE_SECONDS = 60
+DEFAULT_IDLE_TIMEOUT_SECONDS = 600
+KERBEROS_CHECK_SECONDS = 300
+
+ENGINES = ("hive", "impala", "doris")
+
+
+class KerberosTicket:
+    """Checks for a valid ticket at most once per ``KERBEROS_CHECK_SECONDS``.
+
+    If ``klist -s`` reports no valid ticket and the engine config has
+    ``principal`` and ``keytab``, a new one is obtained with ``kinit -kt``.
+    All sessions share the resulting credential cache.
+    """
+
+    def __init__(self, principal: Optional[str] = None, keytab: Optional[str] = None) -> None:
+        self.principal = principal
+        self.keytab = keytab
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def ensure(self) -> None:
+        with self._lock:
+            if time.monotonic() - self._checked_at < KERBEROS_CHECK_SECONDS:
+                return
+            if subprocess.run(["klist", "-s"], check=False).returncode != 0:
+                if not (self.principal and self.keytab):
+                    raise RuntimeError("no valid Kerberos ticket; run kinit or set principal/keytab")
+                subprocess.run(["kinit", "-kt", self.keytab, self.principal], check=True)
+            self._checked_at = time.monotonic()
+
+
+def _parse_jdbc_url(url: str) -> Dict:
+    match = re.match(r"jdbc:hive2://([^:/;]+)(?::(\d+))?(?:/([^;?]*))?", url)
+    if not match:
+        raise ValueError(f"unsupported hive jdbc_url: {url}")
+    host, port, database = match.groups()
+    return {"host": host, "port": int(port or 10000), "database": database or "default"}
+
+
+def connection_factory(engine: str, cfg: Dict) -> Callable[[], object]:
+    """Return a zero-argument callable opening one DB-API connection."""
+    if engine == "hive":
+        from pyhive import hive
+
+        target = _parse_jdbc_url(cfg["jdbc_url"])
+        kerberos = (cfg.get("auth") or "NONE").upper() == "KERBEROS"
+        ticket = KerberosTicket(cfg.get("principal"), cfg.get("keytab")) if kerberos else None
+
+        def connect():
+            if ticket:
+                ticket.ensure()
+                return hive.connect(auth="KERBEROS", kerberos_service_name=cfg.get("kerberos_service_name", "hive"),
+                                    **target)
+            return hive.connect(username=cfg.get("user"), **target)
+
+        return connect
+    if engine == "impala":
+        from impala.dbapi import connect as impala_connect
+
+        kerberos = (cfg.get("auth") or "NONE").upper() == "KERBEROS"
+        ticket = KerberosTicket(cfg.get("principal"), cfg.get("keytab")) if kerberos else None
+        # impyla speaks HiveServer2; ``port`` is the impala-shell (Beeswax) port.
+        port = int(cfg.get("hs2_port", 21050))
+
+        def connect():
+            if ticket:
+                ticket.ensure()
+                return impala_connect(host=cfg["host"], port=port,
+                                      use_ssl=bool(cfg.get("use_ssl")), auth_mechanism="GSSAPI",
+                                      kerberos_service_name=cfg.get("kerberos_service_name", "impala"))
+            return impala_connect(host=cfg["host"], port=port,
+                                  user=cfg.get("user"), use_ssl=bool(cfg.get("use_ssl")))
+
+        return connect
+    if engine == "doris":
+        import pymysql
+
+        def connect():
+            return pymysql.connect(host=cfg["fe_host"], port=int(cfg.get("fe_query_port", 9030)),
+                                   user=cfg["user"], password=cfg.get("password") or "", charset="utf8mb4")
+
+        return connect
+    raise ValueError(f"unknown engine '{engine}', expected one of {ENGINES}")
+
+
+class _PooledConnection:
+    __slots__ = ("conn", "last_used")
+
+    def __init__(self, conn) -> None:
+        self.conn = conn
+        self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    """Bounded pool of keep-alive DB-API connections for one engine."""
+
+    def __init__(
+        self,
+        factory: Callable[[], object],
+        max_size: int = DEFAULT_POOL_SIZE,
+        keepalive_seconds: float = DEFAULT_KEEPALIVE_SECONDS,
+        idle_timeout_seconds: float = DEFAULT_IDLE_TIMEOUT_SECONDS,
+    ) -> None:
+        self.factory = factory
+        self.max_size = max_size
+        self.keepalive_seconds = keepalive_seconds
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self._idle: "queue.LifoQueue[_PooledConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._closed = False
+
+    def _checkout(self) -> _PooledConnection:
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                return _PooledConnection(self.factory())
+            idle = time.monotonic() - pooled.last_used
+            if idle > self.idle_timeout_seconds:
+                _close_quietly(pooled.conn)
+                continue
+            if idle > self.keepalive_seconds and not _ping(pooled.conn):
+                _close_quietly(pooled.conn)
+                continue
+            return pooled
+
+    @contextmanager
+    def connection(self) -> Iterator[object]:
+        """Borrow a connection; it goes back to the pool unless it is broken.
+
+        A statement error (e.g. DESCRIBE of a missing table) keeps the warm
+        session; it is only discarded when ``SELECT 1`` on it fails too.
+        """
+        self._slots.acquire()
+        pooled = None
+        try:
+            pooled = self._checkout()
+            yield pooled.conn
+        except Exception:
+            if pooled is not None and not _ping(pooled.conn):
+                _close_quietly(pooled.conn)
+                pooled = None
+            raise
+        finally:
+            if pooled is not None:
+                pooled.last_used = time.monotonic()
+                if self._closed:
+                    _close_quietly(pooled.conn)
+                else:
+                    self._idle.put(pooled)
+            self._slots.release()
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                _close_quietly(self._idle.get_nowait().conn)
+            except queue.Empty:
+                return
+
+
+def _ping(conn) -> bool:
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT 1")
+        cur.fetchall()
+        cur.close()
+        return True
+    except Exception:
+        return False
+
+
+def _close_quietly(conn) -> None:
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class EnginePools:
+    """Lazily created per-engine pools plus the batch query API."""
+
+    def __init__(self, config: Optional[Dict] = None,
+                 factories: Optional[Dict[str, Callable[[], object]]] = None) -> None:
+        self.config = config if config is not None else load_connections()
+        self._factories = dict(factories or {})
+        self._pools: Dict[str, ConnectionPool] = {}
+        self._lock = threading.Lock()
+
+    def pool(self, engine: str) -> ConnectionPool:
+        with self._lock:
+            if engine not in self._pools:
+                cfg = self.config.get(engine) or {}
+                factory = self._factories.get(engine) or connection_factory(engine, cfg)
+                self._pools[engine] = ConnectionPool(
+                    factory,
+                    max_size=int(cfg.get("pool_size", DEFAULT_POOL_SIZE)),
+                    keepalive_seconds=float(cfg.get("keepalive_seconds", DEFAULT_KEEPALIVE_SECONDS)),
+                )
+            return self._pools[engine]
+
+    def close(self) -> None:
+        with self._lock:
+            for pool in self._pools.values():
+                pool.close()
+            self._pools.clear()
+
+    def query(self, engine: str, sql: str) -> Dict:
+        """Run one statement on a pooled session; never raises."""
+        started = time.perf_counter()
+        result: Dict = {"engine": engine, "sql": sql}
+        try:
+            with self.pool(engine).connection() as conn:
+                acquired = time.perf_counter()
+                cur = conn.cursor()
+                try:
+                    with tracing.backend(engine, sql):
+                        cur.execute(sql)
+                        rows = cur.fetchall() if cur.description else []
+                    columns = [d[0] for d in cur.description or ()]
+                finally:
+                    cur.close()
+            result.update(ok=True, columns=columns, rows=[list(r) for r in rows],
+                          wait_ms=round((acquired - started) * 1000, 1))
+        except Exception as e:
+            result.update(ok=False, error=f"{type(e).__name__}: {e}")
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    def run_many(self, items: Sequence[Dict], max_workers: Optional[int] = None) -> Dict:
+        """Run ``[{"engine": ..., "sql": ...}, ...]`` concurrently, results in input order."""
+        started = time.perf_counter()
+        if not items:
+            return {"results": [], "elapsed_ms": 0.0}
+        if max_workers is None:
+            max_workers = sum(self.pool(e).max_size for e in {i["engine"] for i in items})
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+            run = tracing.bind(lambda i: self.query(i["engine"], i["sql"]))
+            results = list(executor.map(run, items))
+        return {"results": results, "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+    def _batch(self, engine: str, key: str, values: Sequence[str], build_sql: Callable[[str], str]) -> Dict:
+        """Run ``build_sql(value)`` for each value; a value that fails validation only fails its own item."""
+        items, invalid = [], {}
+        for pos, value in enumerate(values):
+            try:
+                items.append({"engine": engine, "sql": build_sql(value)})
+            except ValueError as e:
+                invalid[pos] = {"engine": engine, "sql": None, "ok": False,
+                                "error": f"ValueError: {e}", "elapsed_ms": 0.0}
+        batch = self.run_many(items)
+        executed = iter(batch["results"])
+        batch["results"] = [invalid[pos] if pos in invalid else next(executed) for pos in range(len(values))]
+        for value, result in zip(values, batch["results"]):
+            result[key] = value
+        return batch
+
+    @tracing.traced("describe_many")
+    def describe_many(self, engine: str, tables: Sequence[str]) -> Dict:
+        """``DESCRIBE`` each ``db.table`` concurrently on ``engine``."""
+        verb = "DESC" if engine == "doris" else "DESCRIBE FORMATTED"
+        return self._batch(engine, "table", tables, lambda t: f"{verb} {_quote_name(t)}")
+
+    @tracing.traced("search_many")
+    def search_many(self, engine: str, database: str, keywords: Sequence[str]) -> Dict:
+        """List tables of ``database`` whose name contains each keyword, concurrently."""
+        if engine == "doris":
+            sql = "SHOW TABLES FROM {db} LIKE '%{kw}%'"
+        else:
+            sql = "SHOW TABLES IN {db} LIKE '*{kw}*'"
+        return self._batch(engine, "keyword", keywords,
+                           lambda k: sql.format(db=_quote_name(database), kw=_quote_pattern(k)))
+
+
+_NAME_RE = re.compile(r"^[A-Za-z0-9_]+(\.[A-Za-z0-9_]+)?$")
+
+
+def _quote_name(name: str) -> str:
+    if not _NAME_RE.match(name):
+        raise ValueError(f"invalid table name: {name!r}")
+    return name
+
+
+def _quote_pattern(keyword: str) -> str:
+    if re.search(r"['\\;]", keyword):
+        raise ValueError(f"invalid search keyword: {keyword!r}")
+    return keyword
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Batched metadata queries over pooled connections")
+    parser.add_argument("--config", help="connections.yaml path")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("describe")
+    p.add_argument("engine", choices=ENGINES)
+    p.add_argument("tables", nargs="+", help="db.table")
+    p = sub.add_parser("search")
+    p.add_argument("engine", choices=ENGINES)
+    p.add_argument("database")
+    p.add_argument("keywords", nargs="+")
+    args = parser.parse_args(argv)
+
+    pools = EnginePools(load_connections(args.config))
+    try:
+        if args.command == "describe":
+            result = pools.describe_many(args.engine, args.tables)
+        else:
+            result = pools.search_many(args.engine, args.database, args.keywords)
+    finally:
+        pools.close()
+    json.dump(result, sys.stdout, ensure_ascii=False, indent=2, default=str)
+    print()
+    return 0 if all(r["ok"] for r in result["results"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
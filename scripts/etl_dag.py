@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Table lineage DAG and incremental recompute for the ETL scripts under sql/.
+
+``lineage`` parses every non-DDL script into the tables it writes
+(INSERT OVERWRITE/INTO, CREATE TABLE AS) and reads (FROM/JOIN, CTEs
+excluded), and links scripts through those tables (ods -> dwd -> dws -> dm/da).
+Each script also carries its engine, ``doris`` under ``sql/doris/`` and
+``hive`` elsewhere (the rule sql_lint.py uses).
+
+``plan`` / ``run`` take the source partitions that changed for a date and
+select only the downstream scripts, in topological order. ``run`` executes
+independent branches concurrently (``--parallelism``), one ``hive -f`` process
+per script (the cli session of backfill_hive.py, so no session state such as
+``set`` or ``use`` leaks from one script into the next); a script starts as
+soon as its affected upstream scripts succeeded, and its dependents are
+skipped if it fails. Only Hive scripts are executed: a selected Doris script
+is reported as ``skipped_engine`` (run it with the Doris tooling) and its
+dependents are evaluated as if its outputs had not changed.
+
+Partition fingerprints (numRows / transient_lastDdlTime of each input
+partition, read from the metadata snapshot) are recorded after each
+successful run. An input rewritten by an upstream script earlier in the same
+run is recorded as that upstream run instead, since the snapshot still holds
+its old fingerprint; it counts as unchanged until the upstream script runs
+again. A script whose inputs were not rewritten in this run and whose
+fingerprints match the recorded ones is skipped, so ``run --dt D`` without
+``--changed`` only recomputes what actually moved. Refresh the snapshot first
+(``metadata_snapshot.py refresh``) so fingerprints are current.
+
+Usage:
+    python scripts/etl_dag.py lineage [--format json|dot]
+    python scripts/etl_dag.py plan --dt 2026-03-01 --changed ph_sac_ods.t1 [--changed ...]
+    python scripts/etl_dag.py run  --dt 2026-03-01 [--changed ...] [--parallelism 4]
+        [--dry-run]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Sequence, Set
+
+from backfill_hive import CliSession, PartitionFailed
+from dw_config import REPO_ROOT
+from metadata_snapshot import DEFAULT_SNAPSHOT_PATH, MetadataSnapshot
+from sql_lint import QUALIFIED_NAME, script_engine, split_statements, strip_sql
+
+DEFAULT_STATE_PATH = os.path.join(REPO_ROOT, ".cache", "etl_dag", "state.json")
+DEFAULT_PARALLELISM = 4
+
+_TARGET_RE = re.compile(
+    r"\b(?:insert\s+(?:overwrite|into)\s+(?:table\s+)?|create\s+table\s+(?:if\s+not\s+exists\s+)?)"
+    rf"({QUALIFIED_NAME})",
+    re.I,
+)
+_SOURCE_RE = re.compile(rf"\b(?:from|join)\s+({QUALIFIED_NAME})", re.I)
+_CTE_RE = re.compile(r"(?:\bwith|,)\s*([A-Za-z_]\w*)\s+as\s*\(", re.I)
+
+
+def _norm(name: str) -> str:
+    return name.replace("`", "").lower()
+
+
+def extract_lineage(path: str) -> Dict:
+    """Return {"engine": ..., "writes": [...], "reads": [...]} of one script."""
+    text = strip_sql(open(path, encoding="utf-8").read())
+    writes: Set[str] = set()
+    reads: Set[str] = set()
+    for _, stmt in split_statements(text):
+        ctes = {_norm(m.group(1)) for m in _CTE_RE.finditer(stmt)}
+        writes.update(_norm(m.group(1)) for m in _TARGET_RE.finditer(stmt))
+        reads.update(t for t in (_norm(m.group(1)) for m in _SOURCE_RE.finditer(stmt)) if t not in ctes)
+    return {"engine": script_engine(path), "writes": sorted(writes), "reads": sorted(reads - writes)}
+
+
+class LineageGraph:
+    def __init__(self, scripts: Dict[str, Dict]) -> None:
+        self.scripts = scripts
+        self.writers: Dict[str, Set[str]] = {}
+        for script, io in scripts.items():
+            for table in io["writes"]:
+                self.writers.setdefault(table, set()).add(script)
+        self.upstream: Dict[str, Set[str]] = {
+            s: {w for t in io["reads"] for w in self.writers_of(t)} - {s} for s, io in scripts.items()
+        }
+        self.downstream: Dict[str, Set[str]] = {s: set() for s in scripts}
+        for script, ups in self.upstream.items():
+            for up in ups:
+                self.downstream[up].add(script)
+
+    @classmethod
+    def from_tree(cls, root: str = os.path.join(REPO_ROOT, "sql")) -> "LineageGraph":
+        scripts = {}
+        for base, _, names in os.walk(root):
+            if os.path.basename(base) == "ddl":
+                continue
+            for name in sorted(names):
+                if name.endswith(".sql"):
+                    path = os.path.join(base, name)
+                    scripts[os.path.relpath(path, REPO_ROOT)] = extract_lineage(path)
+        return cls(scripts)
+
+    def writers_of(self, table: str) -> Set[str]:
+        if table in self.writers:
+            return self.writers[table]
+        short = table.split(".")[-1]
+        return {s for t, ws in self.writers.items() if t.split(".")[-1] == short for s in ws}
+
+    def readers_of(self, table: str) -> Set[str]:
+        table = _norm(table)
+        short = table.split(".")[-1]
+        return {s for s, io in self.scripts.items()
+                if any(r == table or (("." not in r or "." not in table) and r.split(".")[-1] == short)
+                       for r in io["reads"])}
+
+    def affected_by(self, tables: Sequence[str]) -> Set[str]:
+        """Scripts reading ``tables`` plus everything downstream of them."""
+        pending = [s for t in tables for s in self.readers_of(t)]
+        seen: Set[str] = set()
+        while pending:
+            script = pending.pop()
+            if script not in seen:
+                seen.add(script)
+                pending.extend(self.downstream[script])
+        return seen
+
+    def topo_levels(self, subset: Optional[Set[str]] = None) -> List[List[str]]:
+        """Group ``subset`` into levels; scripts in one level are independent."""
+        nodes = set(self.scripts if subset is None else subset)
+        indegree = {s: len(self.upstream[s] & nodes) for s in nodes}
+        level = sorted(s for s, d in indegree.items() if d == 0)
+        levels = []
+        while level:
+            levels.append(level)
+            nxt = []
+            for s in level:
+                for d in self.downstream[s] & nodes:
+                    indegree[d] -= 1
+                    if indegree[d] == 0:
+                        nxt.append(d)
+            level = sorted(nxt)
+        if sum(len(l) for l in levels) != len(nodes):
+            cyclic = sorted(s for s, d in indegree.items() if d > 0)
+            raise ValueError(f"dependency cycle among scripts: {cyclic}")
+        return levels
+
+    def to_dot(self) -> str:
+        lines = ["digraph etl {", "  rankdir=LR;"]
+        for script, io in sorted(self.scripts.items()):
+            for table in io["reads"]:
+                lines.append(f'  "{table}" -> "{script}";')
+            for table in io["writes"]:
+                lines.append(f'  "{script}" -> "{table}";')
+        lines.append("}")
+        return "\n".join(lines)
+
+
+class FingerprintStore:
+    """Input fingerprints of the last successful run per script and date."""
+
+    def __init__(self, path: str = DEFAULT_STATE_PATH) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self.data: Dict[str, Dict[str, Dict]] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.data = json.load(f)
+
+    def get(self, script: str, dt: str) -> Optional[Dict]:
+        return self.data.get(script, {}).get(dt)
+
+    def run_id(self, script: str, dt: str) -> Optional[str]:
+        return (self.get(script, dt) or {}).get("run_id")
+
+    def record(self, script: str, dt: str, inputs: Dict, seconds: float) -> None:
+        with self.lock:
+            self.data.setdefault(script, {})[dt] = {
+                "inputs": inputs, "seconds": seconds, "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "run_id": uuid.uuid4().hex,
+            }
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2, sort_keys=True)
+            os.replace(tmp, self.path)
+
+
+class IncrementalRunner:
+    def __init__(self, graph: LineageGraph, dt: str, snapshot: Optional[MetadataSnapshot],
+                 store: FingerprintStore, parallelism: int = DEFAULT_PARALLELISM, dry_run: bool = False) -> None:
+        self.graph = graph
+        self.dt = dt
+        self.snapshot = snapshot
+        self.store = store
+        self.parallelism = max(1, parallelism)
+        self.dry_run = dry_run
+        self.log_dir = os.path.join(os.path.dirname(os.path.abspath(store.path)), "logs", dt)
+        self._current = threading.local()
+        self._snapshot_lock = threading.Lock()
+
+    def fingerprints(self, script: str, rewritten: Set[str] = frozenset()) -> Dict[str, Optional[Dict]]:
+        """Input fingerprints of ``script``; inputs written by ``rewritten`` scripts name those runs."""
+        inputs: Dict[str, Optional[Dict]] = {}
+        for table in self.graph.scripts[script]["reads"]:
+            writers = sorted(self.graph.writers_of(table) & rewritten)
+            if writers:
+                inputs[table] = {"rewritten_by": {w: self.store.run_id(w, self.dt) for w in writers}}
+            elif self.snapshot is None:
+                inputs[table] = None
+            else:
+                with self._snapshot_lock:
+                    inputs[table] = (self.snapshot.partition_fingerprint(table, f"dt={self.dt}")
+                                     or self.snapshot.partition_fingerprint(table))
+        return inputs
+
+    def _unchanged(self, previous: Dict, inputs: Dict[str, Optional[Dict]]) -> bool:
+        if set(previous) != set(inputs):
+            return False
+        for table, fingerprint in inputs.items():
+            recorded = previous[table]
+            if recorded and "rewritten_by" in recorded:
+                # written by an upstream script in the run that recorded it: unchanged while
+                # that upstream script has not run again
+                if any(self.store.run_id(w, self.dt) != run_id for w, run_id in recorded["rewritten_by"].items()):
+                    return False
+            elif fingerprint is None or fingerprint != recorded:
+                return False
+        return True
+
+    def _log(self, dt: str, text: str) -> None:
+        name = self._current.script.replace(os.sep, "_")
+        os.makedirs(self.log_dir, exist_ok=True)
+        with open(os.path.join(self.log_dir, f"{name}.log"), "a", encoding="utf-8") as f:
+            f.write(text)
+
+    def run(self, changed_tables: Sequence[str]) -> Dict:
+        started = time.monotonic()
+        candidates = self.graph.affected_by(changed_tables) if changed_tables else set(self.graph.scripts)
+        levels = self.graph.topo_levels(candidates)
+        forced = {s for t in changed_tables for s in self.graph.readers_of(t)}
+        rewritten: Set[str] = set()  # scripts that ran successfully in this invocation
+        results: Dict[str, Dict] = {}
+
+        def execute(script: str, rewritten: Set[str]) -> Dict:
+            engine = self.graph.scripts[script].get("engine", "hive")
+            if engine != "hive":
+                return {"status": "skipped_engine", "engine": engine, "seconds": 0.0}
+            upstream_ran = bool(self.graph.upstream[script] & rewritten)
+            inputs = self.fingerprints(script, rewritten)
+            previous = self.store.get(script, self.dt)
+            if (script not in forced and not upstream_ran
+                    and previous is not None and self._unchanged(previous["inputs"], inputs)):
+                return {"status": "skipped_unchanged", "seconds": 0.0}
+            if self.dry_run:
+                return {"status": "would_run", "seconds": 0.0}
+            self._current.script = script
+            t0 = time.monotonic()
+            try:
+                CliSession("", self._log).run(self.dt, os.path.join(REPO_ROOT, script))
+                seconds = round(time.monotonic() - t0, 3)
+                self.store.record(script, self.dt, inputs, seconds)
+            except (PartitionFailed, OSError) as e:
+                return {"status": "failed", "error": str(e), "seconds": round(time.monotonic() - t0, 3)}
+            return {"status": "ok", "seconds": seconds}
+
+        order = [s for level in levels for s in level]
+        pending = set(order)
+        running: Dict = {}
+        with ThreadPoolExecutor(max_workers=self.parallelism) as executor:
+            while pending or running:
+                for script in [s for s in order if s in pending]:
+                    ups = self.graph.upstream[script] & candidates
+                    if any(results.get(u, {}).get("status") in ("failed", "skipped_upstream_failed") for u in ups):
+                        results[script] = {"status": "skipped_upstream_failed", "seconds": 0.0}
+                        pending.discard(script)
+                    elif all(u in results for u in ups):
+                        pending.discard(script)
+                        running[executor.submit(execute, script, set(rewritten))] = script
+                if not running:
+                    continue
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    script = running.pop(future)
+                    results[script] = future.result()
+                    if results[script]["status"] in ("ok", "would_run"):
+                        rewritten.add(script)
+                    print(f"[{script}] {results[script]['status']} ({results[script]['seconds']}s)", file=sys.stderr)
+
+        return {
+            "dt": self.dt,
+            "changed_tables": list(changed_tables),
+            "levels": levels,
+            "ran": sorted(s for s, r in results.items() if r["status"] == "ok"),
+            "skipped_unchanged": sorted(s for s, r in results.items() if r["status"] == "skipped_unchanged"),
+            "skipped_engine": sorted(s for s, r in results.items() if r["status"] == "skipped_engine"),
+            "failed": sorted(s for s, r in results.items() if r["status"] == "failed"),
+            "wall_seconds": round(time.monotonic() - started, 3),
+            "scripts": {s: results[s] for s in order},
+        }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="ETL lineage DAG and incremental recompute")
+    parser.add_argument("--sql-root", default=os.path.join(REPO_ROOT, "sql"))
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("lineage")
+    p.add_argument("--format", choices=("json", "dot"), default="json")
+    for name in ("plan", "run"):
+        p = sub.add_parser(name)
+        p.add_argument("--dt", required=True)
+        p.add_argument("--changed", action="append", default=[], help="changed source table (repeatable)")
+        if name == "run":
+            p.add_argument("--parallelism", type=int, default=DEFAULT_PARALLELISM)
+            p.add_argument("--snapshot", default=DEFAULT_SNAPSHOT_PATH)
+            p.add_argument("--state", default=DEFAULT_STATE_PATH)
+            p.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    graph = LineageGraph.from_tree(args.sql_root)
+    if args.command == "lineage":
+        if args.format == "dot":
+            print(graph.to_dot())
+            return 0
+        result = {"scripts": graph.scripts, "levels": graph.topo_levels()}
+    elif args.command == "plan":
+        affected = graph.affected_by(args.changed) if args.changed else set(graph.scripts)
+        result = {"dt": args.dt, "changed_tables": args.changed, "levels": graph.topo_levels(affected)}
+    else:
+        snapshot = MetadataSnapshot(args.snapshot) if os.path.exists(args.snapshot) else None
+        if snapshot is None:
+            print(f"WARNING: no snapshot at {args.snapshot}; fingerprints unavailable, every "
+                  "selected script runs", file=sys.stderr)
+        runner = IncrementalRunner(graph, args.dt, snapshot, FingerprintStore(args.state), args.parallelism,
+                                   args.dry_run)
+        result = runner.run(args.changed)
+    json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+    return 1 if result.get("failed") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Indexed search and bulk import for public.indicator_registry.
+
+Search (``search_existing_indicators``) ranks indicators by fuzzy bigram
+overlap with the query over indicator_name, target_column and logic_desc.
+Rows are cached in-process together with a bigram inverted index; the cache
+is reloaded only when the registry version (max id, max updated_time, both
+index lookups) changes. The version is probed at most once per
+``VERSION_PROBE_SECONDS`` and the cache is reloaded unconditionally after
+``CACHE_MAX_AGE_SECONDS`` so deletes are picked up too, so repeated lookups
+never rescan the table.
+``--fulltext`` runs the same search server-side through the ngram FULLTEXT
+index declared in indicator_registry.txt instead.
+
+Import loads a 口径 workbook (two columns: 指标名称 / 指标定义和口径, one
+indicator per merged name cell, section headings as A-only rows) and writes
+all indicators in one transaction with batched statements. Re-importing the
+same workbook updates rows in place (matched on name, source table, remarks).
+Worked-example sections (headings containing "举例", "示例", ...) repeat the
+indicator names with concrete months; they are skipped unless
+``--include-examples`` is given, and ``--dry-run`` lists what was skipped.
+
+Usage:
+    python scripts/indicator_registry.py search 过件率
+    python scripts/indicator_registry.py import "docs/0305版本需求/c-m3/c-m3口径.xlsx" \
+        --source-table ph_sac_dmm.dmm_sac_cm3_migr_org --created-by zhangsan [--dry-run] [--include-examples]
+
+Requires pymysql and the ``indicator_registry`` section of config/connections.yaml.
+"""
+
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import tracing
+from dw_config import engine_config
+from metadata_index import NGRAM, ngrams
+
+REGISTRY_TABLE = "public.indicator_registry"
+FIELDS = ("id", "indicator_name", "target_column", "source_table", "logic_desc", "remarks", "updated_time")
+
+# Relative weight of a query bigram found in each field.
+FIELD_WEIGHTS = {"indicator_name": 3.0, "target_column": 2.0, "logic_desc": 1.0}
+SUBSTRING_BONUS = 2.0
+
+COLUMN_LIMITS = {"indicator_name": 50, "target_column": 50, "source_table": 50, "logic_desc": 200, "remarks": 100}
+
+# Both aggregates are answered from an index (PRIMARY, idx_updated_time).
+# Writers set updated_time on insert as well as update (see bulk_upsert).
+_VERSION_SQL = f"SELECT MAX(id), MAX(updated_time) FROM {REGISTRY_TABLE}"
+VERSION_PROBE_SECONDS = 5.0
+CACHE_MAX_AGE_SECONDS = 300.0
+_LOAD_SQL = f"SELECT {', '.join(FIELDS)} FROM {REGISTRY_TABLE}"
+_FULLTEXT_SQL = (
+    f"SELECT {', '.join(FIELDS)}, "
+    "MATCH(indicator_name, target_column, logic_desc) AGAINST (%s IN NATURAL LANGUAGE MODE) AS score "
+    f"FROM {REGISTRY_TABLE} "
+    "WHERE MATCH(indicator_name, target_column, logic_desc) AGAINST (%s IN NATURAL LANGUAGE MODE) "
+    "ORDER BY score DESC LIMIT %s"
+)
+
+
+def connect(config_path: Optional[str] = None):
+    try:
+        import pymysql
+    except ImportError:
+        raise RuntimeError("pymysql is required for the indicator registry: pip install pymysql")
+    cfg = engine_config("indicator_registry", config_path)
+    return pymysql.connect(
+        host=cfg["host"],
+        port=int(cfg.get("port", 3306)),
+        user=cfg["user"],
+        password=cfg.get("password") or "",
+        database=cfg.get("database", "public"),
+        charset="utf8mb4",
+        autocommit=False,
+    )
+
+
+class IndicatorRegistry:
+    """Cached, ranked search over the indicator registry."""
+
+    def __init__(self, conn) -> None:
+        self.conn = conn
+        self._lock = threading.Lock()
+        self._version: Optional[Tuple] = None
+        self._probed_at = 0.0
+        self._loaded_at = 0.0
+        self._rows: List[Dict] = []
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._char_grams: Dict[str, Set[str]] = {}
+
+    def _query(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        with tracing.backend("indicator_registry", sql), self.conn.cursor() as cur:
+            cur.execute(sql, params)
+            rows = list(cur.fetchall())
+        self.conn.commit()  # end the read snapshot so the next version check sees new rows
+        return rows
+
+    def _refresh_cache(self) -> None:
+        now = time.monotonic()
+        if self._version is not None and now - self._probed_at < VERSION_PROBE_SECONDS:
+            return
+        self._probed_at = now
+        version = tuple(self._query(_VERSION_SQL)[0])
+        if version == self._version and now - self._loaded_at < CACHE_MAX_AGE_SECONDS:
+            return
+        self._loaded_at = now
+        rows = [dict(zip(FIELDS, r)) for r in self._query(_LOAD_SQL)]
+        postings: Dict[str, Dict[int, float]] = {}
+        for pos, row in enumerate(rows):
+            for field, weight in FIELD_WEIGHTS.items():
+                for gram in ngrams(row[field] or ""):
+                    slot = postings.setdefault(gram, {})
+                    slot[pos] = max(slot.get(pos, 0.0), weight)
+        char_grams: Dict[str, Set[str]] = {}
+        for gram in postings:
+            for char in gram:
+                char_grams.setdefault(char, set()).add(gram)
+        self._rows, self._postings, self._char_grams, self._version = rows, postings, char_grams, version
+
+    @tracing.traced("search_existing_indicators")
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """Rank cached indicators by weighted bigram coverage of ``query``."""
+        query = query.strip()
+        if not query:
+            return []
+        with tracing.stage("refresh_cache"), self._lock:
+            self._refresh_cache()
+            rows, postings, char_grams = self._rows, self._postings, self._char_grams
+        with tracing.stage("rank"):
+            lowered = query.lower()
+            scores: Dict[int, float] = {}
+            if len(lowered) < NGRAM:
+                # a single character only occurs inside bigrams; score its best field
+                grams = {lowered}
+                for gram in char_grams.get(lowered, ()):
+                    for pos, weight in postings[gram].items():
+                        scores[pos] = max(scores.get(pos, 0.0), weight)
+            else:
+                grams = ngrams(query)
+                for gram in grams:
+                    for pos, weight in postings.get(gram, {}).items():
+                        scores[pos] = scores.get(pos, 0.0) + weight
+            results = []
+            for pos, score in scores.items():
+                row = rows[pos]
+                score /= len(grams) * FIELD_WEIGHTS["indicator_name"]
+                if any(lowered in (row[f] or "").lower() for f in FIELD_WEIGHTS):
+                    score += SUBSTRING_BONUS
+                results.append((score, row))
+            results.sort(key=lambda r: (-r[0], r[1]["id"]))
+            return [_public(row, score) for score, row in results[:limit]]
+
+    @tracing.traced("search_existing_indicators_fulltext")
+    def search_fulltext(self, query: str, limit: int = 10) -> List[Dict]:
+        """Server-side search through the ngram FULLTEXT index (no cache)."""
+        rows = self._query(_FULLTEXT_SQL, (query, query, limit))
+        return [_public(dict(zip(FIELDS, r[:-1])), float(r[-1])) for r in rows]
+
+    def bulk_upsert(self, indicators: Sequence[Dict], created_by: str) -> Dict:
+        """Insert or update ``indicators`` in one transaction.
+
+        Existing rows are matched on (indicator_name, source_table, remarks)
+        with a single lookup; inserts and updates are each sent as one batch.
+        """
+        now = time.strftime("%Y-%m-%d %H:%M:%S")
+        source_tables = sorted({i["source_table"] for i in indicators})
+        try:
+            with self.conn.cursor() as cur:
+                existing: Dict[Tuple[str, str, str], int] = {}
+                if source_tables:
+                    cur.execute(
+                        f"SELECT id, indicator_name, source_table, remarks FROM {REGISTRY_TABLE} "
+                        f"WHERE source_table IN ({', '.join(['%s'] * len(source_tables))})",
+                        source_tables,
+                    )
+                    for id_, name, table, remarks in cur.fetchall():
+                        existing[(name, table, remarks or "")] = id_
+                inserts, updates = [], []
+                for i in indicators:
+                    key = (i["indicator_name"], i["source_table"], i.get("remarks", ""))
+                    if key in existing:
+                        updates.append((i.get("target_column", ""), i["logic_desc"], created_by, now, existing[key]))
+                    else:
+                        inserts.append((i["indicator_name"], i.get("target_column", ""), i["source_table"],
+                                        i["logic_desc"], i.get("remarks", ""), created_by, now, created_by, now))
+                if inserts:
+                    cur.executemany(
+                        f"INSERT INTO {REGISTRY_TABLE} (indicator_name, target_column, source_table, logic_desc, "
+                        "remarks, created_by, created_time, updated_by, updated_time) "
+                        "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                        inserts,
+                    )
+                if updates:
+                    cur.executemany(
+                        f"UPDATE {REGISTRY_TABLE} SET target_column = %s, logic_desc = %s, "
+                        "updated_by = %s, updated_time = %s WHERE id = %s",
+                        updates,
+                    )
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return {"inserted": len(inserts), "updated": len(updates)}
+
+
+def _public(row: Dict, score: float) -> Dict:
+    result = {k: row[k] for k in FIELDS if k != "updated_time"}
+    result["updated_time"] = str(row["updated_time"]) if row.get("updated_time") else None
+    result["score"] = round(score, 3)
+    return result
+
+
+# -- workbook parsing ---------------------------------------------------------
+
+_NS = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+_HEADER_NAMES = {"指标名称", "指标名", "indicator_name"}
+_EXAMPLE_MARKERS = ("举例", "示例", "例如", "例：", "example")
+
+
+def _read_sheet_rows(path: str, sheet: Optional[str] = None) -> List[Tuple[str, str]]:
+    """Return (A, B) cell text for every row of the sheet, using only the stdlib."""
+    with zipfile.ZipFile(path) as zf:
+        shared: List[str] = []
+        if "xl/sharedStrings.xml" in zf.namelist():
+            for si in ET.fromstring(zf.read("xl/sharedStrings.xml")).findall("m:si", _NS):
+                shared.append("".join(t.text or "" for t in si.iter(f"{{{_NS['m']}}}t")))
+        workbook = ET.fromstring(zf.read("xl/workbook.xml"))
+        sheets = workbook.findall("m:sheets/m:sheet", _NS)
+        chosen = next((s for s in sheets if sheet in (None, s.get("name"))), None)
+        if chosen is None:
+            raise ValueError(f"{path}: sheet {sheet!r} not found")
+        rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+        target = next(r.get("Target") for r in rels if r.get("Id") == chosen.get(_REL_NS))
+        root = ET.fromstring(zf.read("xl/" + target.lstrip("/").replace("xl/", "", 1)))
+
+    rows = []
+    for row in root.findall("m:sheetData/m:row", _NS):
+        cells = {"A": "", "B": ""}
+        for c in row.findall("m:c", _NS):
+            col = re.match(r"[A-Z]+", c.get("r", "")).group(0)
+            if col not in cells:
+                continue
+            if c.get("t") == "inlineStr":
+                text = "".join(t.text or "" for t in c.iter(f"{{{_NS['m']}}}t"))
+            else:
+                v = c.find("m:v", _NS)
+                text = "" if v is None else v.text or ""
+                if c.get("t") == "s" and text:
+                    text = shared[int(text)]
+            cells[col] = text.strip()
+        rows.append((cells["A"], cells["B"]))
+    return rows
+
+
+def parse_spec_workbook(path: str, source_table: str, sheet: Optional[str] = None,
+                        include_examples: bool = False) -> Tuple[List[Dict], List[Dict]]:
+    """Turn a 口径 workbook into registry rows; returns (indicators, skipped).
+
+    A row with a name in column A starts an indicator; following rows with an
+    empty A (the rest of a merged name cell) extend its logic_desc. A-only rows
+    are section headings and become the ``remarks`` of the indicators below.
+    Indicators under a worked-example heading ("举例...") are returned as
+    ``skipped`` unless ``include_examples`` is set.
+    """
+    indicators: List[Dict] = []
+    section: List[str] = []
+    current: Optional[Dict] = None
+    for a, b in _read_sheet_rows(path, sheet):
+        if a in _HEADER_NAMES:
+            continue
+        if a and not b:
+            if current is not None:
+                section, current = [], None
+            section.append(a)
+            continue
+        if a:
+            current = {"indicator_name": a, "source_table": source_table, "target_column": "",
+                       "remarks": " / ".join(section), "logic": [b]}
+            indicators.append(current)
+        elif b and current is not None:
+            current["logic"].append(b)
+    kept: List[Dict] = []
+    skipped: List[Dict] = []
+    for i in indicators:
+        i["logic_desc"] = "；".join(i.pop("logic"))
+        if not include_examples and any(m in i["remarks"].lower() for m in _EXAMPLE_MARKERS):
+            skipped.append(i)
+            continue
+        for field, limit in COLUMN_LIMITS.items():
+            if len(i.get(field) or "") > limit:
+                print(f"WARNING: {field} of '{i['indicator_name']}' truncated to {limit} chars", file=sys.stderr)
+                i[field] = i[field][:limit]
+        kept.append(i)
+    return kept, skipped
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Indicator registry search and bulk import")
+    parser.add_argument("--config", help="connections.yaml path")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("search")
+    p.add_argument("query")
+    p.add_argument("--limit", type=int, default=10)
+    p.add_argument("--fulltext", action="store_true", help="use the MySQL ngram FULLTEXT index")
+    p = sub.add_parser("import")
+    p.add_argument("workbook")
+    p.add_argument("--source-table", required=True)
+    p.add_argument("--created-by", required=True)
+    p.add_argument("--sheet")
+    p.add_argument("--dry-run", action="store_true", help="print parsed and skipped indicators only")
+    p.add_argument("--include-examples", action="store_true", help="also import worked-example sections")
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        indicators, skipped = parse_spec_workbook(args.workbook, args.source_table, args.sheet,
+                                                  include_examples=args.include_examples)
+        if args.dry_run:
+            result = {"indicators": indicators, "skipped_examples": skipped}
+        else:
+            result = IndicatorRegistry(connect(args.config)).bulk_upsert(indicators, args.created_by)
+            result["skipped_examples"] = len(skipped)
+    else:
+        registry = IndicatorRegistry(connect(args.config))
+        search = registry.search_fulltext if args.fulltext else registry.search
+        result = search(args.query, args.limit)
+    json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
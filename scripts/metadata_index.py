@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+Character n-gram index over Hive table/column comments.
+
+Implements ``search_by_comment_v2`` from the smart search orchestration design
+(docs/plans/2026-03-03-smart-search-orchestration-design.md, "Future
+Enhancements"): one call takes a list of terms (or a raw business term that is
+expanded through synonym.yaml), matches every term against an inverted index
+of character bigrams, and returns deduplicated tables scored by multi-route
+hits and layer preference (dm/da > dws > dwd > ods).
+
+The index is built from a metastore export with one row per column:
+
+    db_name  table_name  table_comment  column_name  column_type  column_comment
+
+(tab separated, header line required). ``METASTORE_EXPORT_SQL`` produces that
+file from the Hive metastore backing database.
+
+The synonym dictionary is read from the search-hive-metadata skill
+(``.claude/skills/search-hive-metadata/references/synonym.yaml``); set
+DW_SYNONYMS or pass ``--synonyms`` when the skill lives elsewhere.
+
+Usage:
+    python scripts/metadata_index.py <export.tsv> 首逾金额
+    python scripts/metadata_index.py <export.tsv> M1逾期 首次逾期 --no-expand
+"""
+
+import argparse
+import csv
+import heapq
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import tracing
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SYNONYM_PATH = os.environ.get(
+    "DW_SYNONYMS", os.path.join(REPO_ROOT, ".claude", "skills", "search-hive-metadata", "references", "synonym.yaml")
+)
+
+EXPORT_FIELDS = (
+    "db_name",
+    "table_name",
+    "table_comment",
+    "column_name",
+    "column_type",
+    "column_comment",
+)
+
+# Run against the metastore backing database (MySQL) and save as TSV with header.
+METASTORE_EXPORT_SQL = """
+SELECT d.NAME                    AS db_name,
+       t.TBL_NAME                AS table_name,
+       COALESCE(tp.PARAM_VALUE, '') AS table_comment,
+       c.COLUMN_NAME             AS column_name,
+       c.TYPE_NAME               AS column_type,
+       COALESCE(c.COMMENT, '')   AS column_comment
+FROM TBLS t
+JOIN DBS d          ON t.DB_ID = d.DB_ID
+JOIN SDS s          ON t.SD_ID = s.SD_ID
+JOIN COLUMNS_V2 c   ON s.CD_ID = c.CD_ID
+LEFT JOIN TABLE_PARAMS tp ON t.TBL_ID = tp.TBL_ID AND tp.PARAM_KEY = 'comment'
+ORDER BY d.NAME, t.TBL_NAME, c.INTEGER_IDX
+"""
+
+# Layer preference used when ranking (reuses the dm/da > dws > dwd > ods rule).
+LAYER_WEIGHTS = {"dm": 4, "dmm": 4, "da": 4, "ads": 4, "dws": 3, "dwd": 2, "ods": 1}
+
+# Generic measure words match hundreds of fields; they never count as a route.
+LOW_DISCRIMINATION_TERMS = {"金额", "笔数", "比率", "天数", "日期", "率", "数量"}
+
+SEARCH_SCOPES = ("all", "table", "column")
+
+NGRAM = 2
+
+
+def ngrams(text: str, n: int = NGRAM) -> Set[str]:
+    """Return the set of character n-grams of ``text`` (lower-cased).
+
+    Strings shorter than ``n`` yield themselves. Indexed texts are never that
+    short, so a single-character term such as "率" is looked up through the
+    grams that contain it (see ``CommentIndex.lookup``).
+    """
+    text = text.lower()
+    if len(text) < n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def detect_layer(db_name: str, table_name: str) -> str:
+    """Infer the warehouse layer from the table prefix, then the db suffix."""
+    for name in (table_name.lower(), db_name.lower()):
+        for token in name.replace(".", "_").split("_"):
+            if token in LAYER_WEIGHTS:
+                return token
+    return ""
+
+
+@dataclass
+class Document:
+    """One searchable unit: a table comment or a column comment."""
+
+    db_name: str
+    table_name: str
+    table_comment: str
+    column_name: str = ""
+    column_type: str = ""
+    column_comment: str = ""
+
+    @property
+    def is_table(self) -> bool:
+        return not self.column_name
+
+    @property
+    def text(self) -> str:
+        if self.is_table:
+            return f"{self.table_name} {self.table_comment}".lower()
+        return f"{self.column_name} {self.column_comment}".lower()
+
+
+@dataclass
+class TableHit:
+    db_name: str
+    table_name: str
+    table_comment: str
+    layer: str
+    matched_terms: Set[str] = field(default_factory=set)
+    table_terms: Set[str] = field(default_factory=set)
+    columns: Dict[str, Dict] = field(default_factory=dict)
+
+    def score(self) -> Tuple[int, int, int]:
+        routes = len(self.matched_terms - LOW_DISCRIMINATION_TERMS) or (
+            1 if self.matched_terms else 0
+        )
+        return routes, LAYER_WEIGHTS.get(self.layer, 0), len(self.columns)
+
+    def to_dict(self) -> Dict:
+        routes, layer_weight, _ = self.score()
+        return {
+            "db_name": self.db_name,
+            "table_name": self.table_name,
+            "table_comment": self.table_comment,
+            "layer": self.layer,
+            "route_hits": routes,
+            "score": routes * 10 + layer_weight,
+            "matched_terms": sorted(self.matched_terms),
+            "table_matched_terms": sorted(self.table_terms),
+            "matched_columns": sorted(
+                self.columns.values(), key=lambda c: (-len(c["matched_terms"]), c["column_name"])
+            ),
+        }
+
+
+class CommentIndex:
+    """Inverted bigram index over table and column comments."""
+
+    def __init__(self) -> None:
+        self.docs: List[Document] = []
+        self.texts: List[str] = []
+        self.doc_table: List[int] = []
+        self.postings: Dict[str, List[int]] = {}
+        self.char_grams: Dict[str, Set[str]] = {}
+        self.tables: List[Tuple[str, str, str, str]] = []
+        self._table_ids: Dict[Tuple[str, str], int] = {}
+
+    def add(self, row: Dict[str, str]) -> None:
+        """Add one export row; the owning table is indexed on first sight."""
+        key = (row["db_name"], row["table_name"])
+        table_id = self._table_ids.get(key)
+        if table_id is None:
+            table_id = self._table_ids[key] = len(self.tables)
+            comment = row.get("table_comment") or ""
+            self.tables.append((key[0], key[1], comment, detect_layer(*key)))
+            self._add_doc(Document(key[0], key[1], comment), table_id)
+        if row.get("column_name"):
+            self._add_doc(
+                Document(
+                    row["db_name"],
+                    row["table_name"],
+                    row.get("table_comment") or "",
+                    row["column_name"],
+                    row.get("column_type") or "",
+                    row.get("column_comment") or "",
+                ),
+                table_id,
+            )
+
+    def _add_doc(self, doc: Document, table_id: int) -> None:
+        doc_id = len(self.docs)
+        text = doc.text
+        self.docs.append(doc)
+        self.texts.append(text)
+        self.doc_table.append(table_id)
+        for gram in ngrams(text):
+            posting = self.postings.get(gram)
+            if posting is None:
+                posting = self.postings[gram] = []
+                for char in gram:
+                    self.char_grams.setdefault(char, set()).add(gram)
+            posting.append(doc_id)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, str]]) -> "CommentIndex":
+        index = cls()
+        for row in rows:
+            index.add(row)
+        return index
+
+    @classmethod
+    def from_export(cls, path: str) -> "CommentIndex":
+        return cls.from_rows(read_export(path))
+
+    def lookup(self, term: str) -> List[int]:
+        """Return ids of documents whose text contains ``term``.
+
+        Candidates come from intersecting the postings of every n-gram of the
+        term (shortest list first); a term shorter than one n-gram takes the
+        union of the postings of every n-gram containing it. Each candidate is
+        then verified with a substring check so n-gram collisions never produce
+        false hits.
+        """
+        term = term.lower().strip()
+        if not term:
+            return []
+        if len(term) < NGRAM:
+            found: Set[int] = set()
+            for gram in self.char_grams.get(term, ()):
+                found.update(self.postings[gram])
+            return sorted(found)
+        lists = []
+        for gram in ngrams(term):
+            posting = self.postings.get(gram)
+            if not posting:
+                return []
+            lists.append(posting)
+        lists.sort(key=len)
+        if len(lists) == 1:
+            candidates: Iterable[int] = lists[0]
+        else:
+            candidates = set(lists[0])
+            for posting in lists[1:]:
+                candidates.intersection_update(posting)
+                if not candidates:
+                    return []
+        texts = self.texts
+        return sorted(i for i in candidates if term in texts[i])
+
+    def search_by_comment_v2(
+        self,
+        terms: Sequence[str],
+        search_scope: str = "all",
+        limit: int = 20,
+    ) -> List[Dict]:
+        """Match all ``terms`` in one pass and rank the deduplicated tables.
+
+        Tables hit by more distinct terms rank first, then dm/da > dws > dwd >
+        ods, then the number of matched columns. Low-discrimination terms
+        ("金额", "笔数", ...) only annotate tables already found by a specific
+        term, unless the query has nothing else. Ranking works on table ids;
+        column details are only materialized for the returned tables.
+        """
+        if search_scope not in SEARCH_SCOPES:
+            raise ValueError(f"search_scope must be one of {SEARCH_SCOPES}, got {search_scope!r}")
+        unique = list(dict.fromkeys(t.strip() for t in terms if t and t.strip()))
+        specific = [t for t in unique if t not in LOW_DISCRIMINATION_TERMS]
+        generic = [t for t in unique if t in LOW_DISCRIMINATION_TERMS]
+
+        term_docs: Dict[str, List[int]] = {}
+        table_terms: Dict[int, Set[str]] = {}
+        table_columns: Dict[int, Set[int]] = {}
+        with tracing.stage("match"):
+            for term in specific + generic:
+                annotate_only = bool(specific) and term in LOW_DISCRIMINATION_TERMS
+                ids = self.lookup(term)
+                if search_scope != "all":
+                    want_table = search_scope == "table"
+                    ids = [i for i in ids if self.docs[i].is_table == want_table]
+                term_docs[term] = ids
+                for doc_id in ids:
+                    table_id = self.doc_table[doc_id]
+                    if annotate_only and table_id not in table_terms:
+                        continue
+                    table_terms.setdefault(table_id, set()).add(term)
+                    columns = table_columns.setdefault(table_id, set())
+                    if not self.docs[doc_id].is_table:
+                        columns.add(doc_id)
+
+        def rank_key(table_id: int):
+            matched = table_terms[table_id]
+            routes = len(matched - LOW_DISCRIMINATION_TERMS) or 1
+            db, table, _, layer = self.tables[table_id]
+            return (-routes, -LAYER_WEIGHTS.get(layer, 0), -len(table_columns[table_id]), db, table)
+
+        with tracing.stage("build_results"):
+            top = heapq.nsmallest(limit, table_terms, key=rank_key)
+            hits = {t: TableHit(*self.tables[t]) for t in top}
+            for term, ids in term_docs.items():
+                for doc_id in ids:
+                    hit = hits.get(self.doc_table[doc_id])
+                    if hit is None:
+                        continue
+                    doc = self.docs[doc_id]
+                    hit.matched_terms.add(term)
+                    if doc.is_table:
+                        hit.table_terms.add(term)
+                    else:
+                        column = hit.columns.setdefault(
+                            doc.column_name,
+                            {
+                                "column_name": doc.column_name,
+                                "column_type": doc.column_type,
+                                "column_comment": doc.column_comment,
+                                "matched_terms": [],
+                            },
+                        )
+                        column["matched_terms"].append(term)
+            return [hits[t].to_dict() for t in top]
+
+
+def read_export(path: str) -> Iterable[Dict[str, str]]:
+    """Yield rows of a metastore export TSV (see ``METASTORE_EXPORT_SQL``)."""
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f, delimiter="\t", quoting=csv.QUOTE_NONE)
+        missing = set(EXPORT_FIELDS) - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"{path}: export is missing columns {sorted(missing)}")
+        yield from reader
+
+
+def load_synonyms(path: str = DEFAULT_SYNONYM_PATH) -> Dict[str, List[str]]:
+    """Load the ``synonyms`` mapping from synonym.yaml.
+
+    Returns an empty mapping when the file or PyYAML is unavailable, matching
+    the orchestration fallback (skip the dictionary, keep the raw term).
+    """
+    if not os.path.exists(path):
+        print(f"WARNING: {path} not found (set DW_SYNONYMS or --synonyms), synonym expansion disabled",
+              file=sys.stderr)
+        return {}
+    try:
+        import yaml
+    except ImportError:
+        print("WARNING: PyYAML not installed, synonym expansion disabled", file=sys.stderr)
+        return {}
+    with open(path, encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    return {str(k): [str(v) for v in (vals or [])] for k, vals in (data.get("synonyms") or {}).items()}
+
+
+def decompose(term: str, synonyms: Dict[str, List[str]]) -> List[str]:
+    """Split a compound term into dictionary units by greedy longest match.
+
+    "贷款首逾金额" -> ["首逾", "金额"] when both are dictionary keys; characters
+    not covered by any key are kept together as their own unit.
+    """
+    keys = sorted(synonyms, key=len, reverse=True)
+    units: List[str] = []
+    rest = ""
+    i = 0
+    while i < len(term):
+        for key in keys:
+            if term.startswith(key, i):
+                if rest:
+                    units.append(rest)
+                    rest = ""
+                units.append(key)
+                i += len(key)
+                break
+        else:
+            rest += term[i]
+            i += 1
+    if rest:
+        units.append(rest)
+    return units
+
+
+def expand_terms(term: str, synonyms: Dict[str, List[str]]) -> List[str]:
+    """Expand a raw business term into the candidate query terms.
+
+    The raw term is always kept; a direct dictionary hit contributes all of its
+    standard terms, otherwise each decomposed unit is expanded. Low
+    discrimination units ("金额") are kept but not expanded, since their
+    synonyms ("余额", "合计", ...) would match most of the metastore.
+    """
+    candidates = [term]
+    if term in synonyms:
+        candidates.extend(synonyms[term])
+    else:
+        for unit in decompose(term, synonyms):
+            candidates.append(unit)
+            if unit not in LOW_DISCRIMINATION_TERMS:
+                candidates.extend(synonyms.get(unit, ()))
+    return list(dict.fromkeys(c for c in candidates if c))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Multi-term indexed comment search (search_by_comment_v2)")
+    parser.add_argument("export", help="metastore export TSV")
+    parser.add_argument("terms", nargs="+", help="terms to match; a single term is synonym-expanded")
+    parser.add_argument("--scope", choices=SEARCH_SCOPES, default="all")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--synonyms", default=DEFAULT_SYNONYM_PATH, help="path to synonym.yaml")
+    parser.add_argument("--no-expand", action="store_true", help="search the given terms as-is")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    index = CommentIndex.from_export(args.export)
+    built = time.perf_counter()
+
+    terms = list(args.terms)
+    if len(terms) == 1 and not args.no_expand:
+        terms = expand_terms(terms[0], load_synonyms(args.synonyms))
+    results = index.search_by_comment_v2(terms, search_scope=args.scope, limit=args.limit)
+    searched = time.perf_counter()
+
+    json.dump(
+        {
+            "terms": terms,
+            "results": results,
+            "index_docs": len(index.docs),
+            "build_ms": round((built - started) * 1000, 1),
+            "search_ms": round((searched - built) * 1000, 2),
+        },
+        sys.stdout,
+        ensure_ascii=False,
+        indent=2,
+    )
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
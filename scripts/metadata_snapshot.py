@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+"""
+Local SQLite snapshot of Hive metastore metadata.
+
+Keeps databases, tables, columns, comments and partition info in one SQLite
+file so search_table / search_by_comment / table-detail lookups never go live
+to the metastore. The snapshot is built once by a bulk export and afterwards
+refreshed incrementally: only tables whose ``transient_lastDdlTime`` (table or
+any partition) moved past the stored watermark, or whose partition count no
+longer matches the metastore (dropped partitions), are re-fetched, and dropped
+tables are pruned. Cold start just opens the file (memory-mapped reads).
+
+The search tools return ``{"snapshot_age_seconds": ..., "results": ...}`` so
+callers always see how old the data is.
+
+Usage:
+    python scripts/metadata_snapshot.py refresh [--full]
+    python scripts/metadata_snapshot.py import-export <export.tsv>
+    python scripts/metadata_snapshot.py status
+    python scripts/metadata_snapshot.py search-table <keyword>
+    python scripts/metadata_snapshot.py search-comment <term> [--scope all|table|column]
+    python scripts/metadata_snapshot.py search-v2 <term> [<term> ...]
+    python scripts/metadata_snapshot.py describe <db.table>
+
+The snapshot path defaults to .cache/metadata_snapshot.db and can be set with
+DW_METADATA_SNAPSHOT or --db. ``refresh`` reads the ``metastore`` section of
+config/connections.yaml (requires pymysql).
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+import tracing
+from dw_config import REPO_ROOT, engine_config
+from metadata_index import (
+    DEFAULT_SYNONYM_PATH,
+    SEARCH_SCOPES,
+    CommentIndex,
+    expand_terms,
+    load_synonyms,
+    read_export,
+)
+
+DEFAULT_SNAPSHOT_PATH = os.environ.get(
+    "DW_METADATA_SNAPSHOT", os.path.join(REPO_ROOT, ".cache", "metadata_snapshot.db")
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tables (
+    tbl_id          INTEGER PRIMARY KEY,
+    db_name         TEXT NOT NULL,
+    table_name      TEXT NOT NULL,
+    table_type      TEXT DEFAULT '',
+    table_comment   TEXT DEFAULT '',
+    location        TEXT DEFAULT '',
+    input_format    TEXT DEFAULT '',
+    partition_keys  TEXT DEFAULT '[]',
+    last_modified   INTEGER DEFAULT 0,
+    UNIQUE (db_name, table_name)
+);
+CREATE TABLE IF NOT EXISTS columns (
+    tbl_id          INTEGER NOT NULL,
+    idx             INTEGER NOT NULL,
+    column_name     TEXT NOT NULL,
+    column_type     TEXT DEFAULT '',
+    column_comment  TEXT DEFAULT '',
+    PRIMARY KEY (tbl_id, idx)
+);
+CREATE TABLE IF NOT EXISTS partitions (
+    tbl_id          INTEGER NOT NULL,
+    part_name       TEXT NOT NULL,
+    created         INTEGER DEFAULT 0,
+    last_modified   INTEGER DEFAULT 0,
+    num_rows        INTEGER,
+    total_size      INTEGER,
+    PRIMARY KEY (tbl_id, part_name)
+);
+CREATE TABLE IF NOT EXISTS snapshot_meta (
+    key             TEXT PRIMARY KEY,
+    value           TEXT
+);
+"""
+
+# Metastore (MySQL) queries; ``{ids}`` is expanded to a %s placeholder list.
+_TABLES_SQL = """
+SELECT t.TBL_ID, d.NAME, t.TBL_NAME, t.TBL_TYPE,
+       COALESCE(pc.PARAM_VALUE, ''), COALESCE(s.LOCATION, ''), COALESCE(s.INPUT_FORMAT, ''),
+       s.CD_ID, CAST(COALESCE(pt.PARAM_VALUE, '0') AS UNSIGNED)
+FROM TBLS t
+JOIN DBS d ON t.DB_ID = d.DB_ID
+LEFT JOIN SDS s ON t.SD_ID = s.SD_ID
+LEFT JOIN TABLE_PARAMS pc ON t.TBL_ID = pc.TBL_ID AND pc.PARAM_KEY = 'comment'
+LEFT JOIN TABLE_PARAMS pt ON t.TBL_ID = pt.TBL_ID AND pt.PARAM_KEY = 'transient_lastDdlTime'
+WHERE t.TBL_ID IN ({ids})
+"""
+
+_ALL_TABLE_IDS_SQL = "SELECT TBL_ID FROM TBLS"
+
+_PARTITION_COUNTS_SQL = "SELECT TBL_ID, COUNT(*) FROM PARTITIONS GROUP BY TBL_ID"
+
+_CHANGED_TABLE_IDS_SQL = """
+SELECT TBL_ID FROM TABLE_PARAMS
+WHERE PARAM_KEY = 'transient_lastDdlTime' AND CAST(PARAM_VALUE AS UNSIGNED) >= %s
+UNION
+SELECT p.TBL_ID FROM PARTITIONS p
+JOIN PARTITION_PARAMS pp ON p.PART_ID = pp.PART_ID
+WHERE pp.PARAM_KEY = 'transient_lastDdlTime' AND CAST(pp.PARAM_VALUE AS UNSIGNED) >= %s
+"""
+
+# Read before the id queries: anything modified later has a DDL time >= this.
+_MAX_DDL_TIME_SQL = """
+SELECT MAX(v) FROM (
+    SELECT MAX(CAST(PARAM_VALUE AS UNSIGNED)) AS v FROM TABLE_PARAMS
+    WHERE PARAM_KEY = 'transient_lastDdlTime'
+    UNION ALL
+    SELECT MAX(CAST(PARAM_VALUE AS UNSIGNED)) FROM PARTITION_PARAMS
+    WHERE PARAM_KEY = 'transient_lastDdlTime'
+) m
+"""
+
+_COLUMNS_SQL = """
+SELECT CD_ID, INTEGER_IDX, COLUMN_NAME, TYPE_NAME, COALESCE(COMMENT, '')
+FROM COLUMNS_V2 WHERE CD_ID IN ({ids})
+"""
+
+_PARTITION_KEYS_SQL = """
+SELECT TBL_ID, INTEGER_IDX, PKEY_NAME, PKEY_TYPE, COALESCE(PKEY_COMMENT, '')
+FROM PARTITION_KEYS WHERE TBL_ID IN ({ids})
+"""
+
+_PARTITIONS_SQL = """
+SELECT p.TBL_ID, p.PART_NAME, p.CREATE_TIME,
+       MAX(CASE WHEN pp.PARAM_KEY = 'transient_lastDdlTime' THEN CAST(pp.PARAM_VALUE AS UNSIGNED) END),
+       MAX(CASE WHEN pp.PARAM_KEY = 'numRows' THEN CAST(pp.PARAM_VALUE AS SIGNED) END),
+       MAX(CASE WHEN pp.PARAM_KEY = 'totalSize' THEN CAST(pp.PARAM_VALUE AS SIGNED) END)
+FROM PARTITIONS p
+LEFT JOIN PARTITION_PARAMS pp ON p.PART_ID = pp.PART_ID
+WHERE p.TBL_ID IN ({ids})
+GROUP BY p.TBL_ID, p.PART_NAME, p.CREATE_TIME
+"""
+
+BATCH_SIZE = 1000
+
+
+def _chunks(items: Sequence, size: int = BATCH_SIZE) -> Iterable[Sequence]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class MetastoreSource:
+    """Bulk reader over the metastore backing database (MySQL)."""
+
+    def __init__(self, conn) -> None:
+        self.conn = conn
+
+    @classmethod
+    def from_config(cls, path: Optional[str] = None) -> "MetastoreSource":
+        try:
+            import pymysql
+        except ImportError:
+            raise RuntimeError("pymysql is required to read the metastore: pip install pymysql")
+        cfg = engine_config("metastore", path)
+        conn = pymysql.connect(
+            host=cfg["host"],
+            port=int(cfg.get("port", 3306)),
+            user=cfg["user"],
+            password=cfg.get("password") or "",
+            database=cfg.get("database", "hive"),
+            charset="utf8mb4",
+        )
+        return cls(conn)
+
+    def _query(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        with self.conn.cursor() as cur:
+            cur.execute(sql, params)
+            return list(cur.fetchall())
+
+    def _query_in(self, sql: str, ids: Sequence) -> List[tuple]:
+        rows: List[tuple] = []
+        for chunk in _chunks(list(ids)):
+            rows.extend(self._query(sql.format(ids=",".join(["%s"] * len(chunk))), chunk))
+        return rows
+
+    def all_table_ids(self) -> Set[int]:
+        return {row[0] for row in self._query(_ALL_TABLE_IDS_SQL)}
+
+    def partition_counts(self) -> Dict[int, int]:
+        return dict(self._query(_PARTITION_COUNTS_SQL))
+
+    def max_ddl_time(self) -> int:
+        return int(self._query(_MAX_DDL_TIME_SQL)[0][0] or 0)
+
+    def changed_table_ids(self, since: int) -> Set[int]:
+        return {row[0] for row in self._query(_CHANGED_TABLE_IDS_SQL, (since, since))}
+
+    def fetch(self, tbl_ids: Sequence[int]) -> Dict[str, List[tuple]]:
+        """Fetch tables, columns, partition keys and partitions for ``tbl_ids``."""
+        tables = self._query_in(_TABLES_SQL, tbl_ids)
+        cd_ids = sorted({row[7] for row in tables if row[7] is not None})
+        return {
+            "tables": tables,
+            "columns": self._query_in(_COLUMNS_SQL, cd_ids) if cd_ids else [],
+            "partition_keys": self._query_in(_PARTITION_KEYS_SQL, tbl_ids),
+            "partitions": self._query_in(_PARTITIONS_SQL, tbl_ids),
+        }
+
+
+class MetadataSnapshot:
+    """SQLite-backed metadata snapshot with search helpers."""
+
+    def __init__(self, path: str = DEFAULT_SNAPSHOT_PATH) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA mmap_size=268435456")
+        self.conn.executescript(SCHEMA)
+        self._index: Optional[CommentIndex] = None
+        self._index_version: Optional[str] = None
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # -- snapshot bookkeeping ------------------------------------------------
+
+    def get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM snapshot_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, **values) -> None:
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO snapshot_meta (key, value) VALUES (?, ?)",
+            [(k, str(v)) for k, v in values.items()],
+        )
+
+    def age_seconds(self) -> Optional[float]:
+        """Seconds since the last successful refresh, None if never built."""
+        refreshed = self.get_meta("refreshed_at")
+        return round(time.time() - float(refreshed), 1) if refreshed else None
+
+    def status(self) -> Dict:
+        count = lambda table: self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        return {
+            "path": self.path,
+            "source": self.get_meta("source"),
+            "refreshed_at": self.get_meta("refreshed_at"),
+            "snapshot_age_seconds": self.age_seconds(),
+            "watermark": int(self.get_meta("watermark", "0")),
+            "tables": count("tables"),
+            "columns": count("columns"),
+            "partitions": count("partitions"),
+        }
+
+    # -- building --------------------------------------------------------------
+
+    def refresh(self, source: MetastoreSource, full: bool = False) -> Dict:
+        """Bring the snapshot up to date with the metastore.
+
+        A full refresh (or the first one) re-fetches every table; afterwards
+        only tables changed since the watermark are re-fetched. The watermark
+        comparison is inclusive so same-second DDL is never missed. The next
+        watermark is the newest DDL time read before anything else, not the
+        newest one among the fetched rows: the fetch can take minutes and a
+        table outside ``changed`` modified meanwhile must stay ahead of it.
+        Dropping a partition bumps no timestamp, so tables whose partition
+        count differs from the metastore are re-fetched too, which prunes the
+        dropped partitions.
+        """
+        started = time.time()
+        watermark = 0 if full else int(self.get_meta("watermark", "0"))
+        high_water = source.max_ddl_time()
+        live_ids = source.all_table_ids()
+        local_ids = {row[0] for row in self.conn.execute("SELECT tbl_id FROM tables")}
+        repartitioned: Set[int] = set()
+        if watermark == 0:
+            changed = live_ids
+        else:
+            changed = (source.changed_table_ids(watermark) & live_ids) | (live_ids - local_ids)
+            live_counts = source.partition_counts()
+            local_counts = dict(self.conn.execute("SELECT tbl_id, COUNT(*) FROM partitions GROUP BY tbl_id"))
+            repartitioned = {
+                t for t in live_ids & local_ids
+                if live_counts.get(t, 0) != local_counts.get(t, 0)
+            } - changed
+            changed |= repartitioned
+        dropped = local_ids - live_ids
+        data = source.fetch(sorted(changed)) if changed else {
+            "tables": [], "columns": [], "partition_keys": [], "partitions": []
+        }
+
+        keys_by_table: Dict[int, List[tuple]] = {}
+        for tbl_id, idx, name, type_, comment in data["partition_keys"]:
+            keys_by_table.setdefault(tbl_id, []).append((idx, name, type_, comment))
+        columns_by_cd: Dict[int, List[tuple]] = {}
+        for cd_id, idx, name, type_, comment in data["columns"]:
+            columns_by_cd.setdefault(cd_id, []).append((idx, name, type_, comment))
+
+        new_watermark = max(watermark, high_water)
+        with self.conn:
+            stale = sorted(dropped | changed)
+            for chunk in _chunks(stale):
+                marks = ",".join("?" * len(chunk))
+                for table in ("tables", "columns", "partitions"):
+                    self.conn.execute(f"DELETE FROM {table} WHERE tbl_id IN ({marks})", chunk)
+            for tbl_id, db, name, type_, comment, location, fmt, cd_id, modified in data["tables"]:
+                pkeys = [
+                    {"name": n, "type": t, "comment": c}
+                    for _, n, t, c in sorted(keys_by_table.get(tbl_id, ()))
+                ]
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO tables VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (tbl_id, db, name, type_, comment, location, fmt,
+                     json.dumps(pkeys, ensure_ascii=False), modified or 0),
+                )
+                self.conn.executemany(
+                    "INSERT INTO columns VALUES (?, ?, ?, ?, ?)",
+                    [(tbl_id, idx, n, t, c) for idx, n, t, c in columns_by_cd.get(cd_id, ())],
+                )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO partitions VALUES (?, ?, ?, ?, ?, ?)",
+                [(t, p, created or 0, modified or 0, rows, size)
+                 for t, p, created, modified, rows, size in data["partitions"]],
+            )
+            self._set_meta(source="metastore", refreshed_at=time.time(), watermark=new_watermark)
+
+        return {
+            "mode": "full" if watermark == 0 else "incremental",
+            "changed_tables": len(changed),
+            "repartitioned_tables": len(repartitioned),
+            "dropped_tables": len(dropped),
+            "watermark": new_watermark,
+            "elapsed_seconds": round(time.time() - started, 2),
+        }
+
+    def import_export(self, path: str) -> Dict:
+        """Replace the snapshot with a metastore export TSV (no partition info)."""
+        ids: Dict[tuple, int] = {}
+        with self.conn:
+            for table in ("tables", "columns", "partitions"):
+                self.conn.execute(f"DELETE FROM {table}")
+            columns = []
+            for row in read_export(path):
+                key = (row["db_name"], row["table_name"])
+                if key not in ids:
+                    ids[key] = len(ids) + 1
+                    self.conn.execute(
+                        "INSERT INTO tables (tbl_id, db_name, table_name, table_comment) VALUES (?, ?, ?, ?)",
+                        (ids[key], key[0], key[1], row["table_comment"] or ""),
+                    )
+                if row["column_name"]:
+                    columns.append((ids[key], len(columns), row["column_name"],
+                                    row["column_type"] or "", row["column_comment"] or ""))
+            self.conn.executemany("INSERT INTO columns VALUES (?, ?, ?, ?, ?)", columns)
+            self._set_meta(source=f"export:{os.path.abspath(path)}", refreshed_at=time.time(), watermark=0)
+        return {"tables": len(ids), "columns": len(columns)}
+
+    # -- search tools ----------------------------------------------------------
+
+    def _select(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        with tracing.backend("snapshot", sql):
+            return self.conn.execute(sql, params).fetchall()
+
+    def _with_age(self, results) -> Dict:
+        return {"snapshot_age_seconds": self.age_seconds(), "results": results}
+
+    @tracing.traced("search_table")
+    def search_table(self, keyword: str, limit: int = 50) -> Dict:
+        """Tables whose name or comment contains ``keyword``."""
+        pattern = f"%{keyword}%"
+        rows = self._select(
+            "SELECT db_name, table_name, table_comment FROM tables "
+            "WHERE table_name LIKE ? OR table_comment LIKE ? "
+            "ORDER BY db_name, table_name LIMIT ?",
+            (pattern, pattern, limit),
+        )
+        return self._with_age([dict(zip(("db_name", "table_name", "table_comment"), r)) for r in rows])
+
+    @tracing.traced("search_by_comment")
+    def search_by_comment(self, term: str, search_scope: str = "all", limit: int = 50) -> Dict:
+        """Single-term LIKE match on table and/or column comments."""
+        if search_scope not in SEARCH_SCOPES:
+            raise ValueError(f"search_scope must be one of {SEARCH_SCOPES}, got {search_scope!r}")
+        pattern = f"%{term}%"
+        table_rows: List[tuple] = []
+        column_rows: List[tuple] = []
+        if search_scope in ("all", "table"):
+            table_rows = self._select(
+                "SELECT db_name, table_name, table_comment FROM tables WHERE table_comment LIKE ? LIMIT ?",
+                (pattern, limit),
+            )
+        if search_scope in ("all", "column"):
+            column_rows = self._select(
+                "SELECT t.db_name, t.table_name, t.table_comment, c.column_name, c.column_comment "
+                "FROM columns c JOIN tables t ON c.tbl_id = t.tbl_id "
+                "WHERE c.column_comment LIKE ? LIMIT ?",
+                (pattern, limit),
+            )
+        with tracing.stage("build_results"):
+            results = [{"db_name": db, "table_name": name, "table_comment": comment,
+                        "column_name": None, "column_comment": None} for db, name, comment in table_rows]
+            results += [{"db_name": db, "table_name": name, "table_comment": comment,
+                         "column_name": col, "column_comment": col_comment}
+                        for db, name, comment, col, col_comment in column_rows]
+        return self._with_age(results[:limit])
+
+    def comment_index(self) -> CommentIndex:
+        """Bigram index over the snapshot, rebuilt only after a refresh."""
+        version = self.get_meta("refreshed_at")
+        if self._index is None or self._index_version != version:
+            rows = self._select(
+                "SELECT t.db_name, t.table_name, t.table_comment, c.column_name, c.column_type, "
+                "c.column_comment FROM tables t LEFT JOIN columns c ON t.tbl_id = c.tbl_id "
+                "ORDER BY t.tbl_id, c.idx"
+            )
+            fields = ("db_name", "table_name", "table_comment", "column_name", "column_type", "column_comment")
+            with tracing.stage("build_index"):
+                self._index = CommentIndex.from_rows(dict(zip(fields, r)) for r in rows)
+            self._index_version = version
+        return self._index
+
+    @tracing.traced("search_by_comment_v2")
+    def search_by_comment_v2(self, terms: Sequence[str], search_scope: str = "all", limit: int = 20) -> Dict:
+        index = self.comment_index()
+        return self._with_age(index.search_by_comment_v2(terms, search_scope=search_scope, limit=limit))
+
+    def partition_fingerprint(self, table: str, part_name: Optional[str] = None) -> Optional[Dict]:
+        """Row count and last-modified time of one partition (or the table).
+
+        ``table`` may be ``db.table`` or a bare table name if it is unique in
+        the snapshot. Returns None when the snapshot does not know it.
+        """
+        db_name, _, table_name = table.rpartition(".")
+        sql = "SELECT tbl_id, last_modified FROM tables WHERE table_name = ?"
+        params: tuple = (table_name,)
+        if db_name:
+            sql += " AND db_name = ?"
+            params += (db_name,)
+        rows = self.conn.execute(sql, params).fetchall()
+        if len(rows) != 1:
+            return None
+        tbl_id, table_modified = rows[0]
+        if part_name is None:
+            return {"num_rows": None, "last_modified": table_modified}
+        row = self.conn.execute(
+            "SELECT num_rows, last_modified FROM partitions WHERE tbl_id = ? AND part_name = ?",
+            (tbl_id, part_name),
+        ).fetchone()
+        return {"num_rows": row[0], "last_modified": row[1]} if row else None
+
+    @tracing.traced("get_table_detail")
+    def get_table_detail(self, db_name: str, table_name: str) -> Dict:
+        """Table detail under ``results`` (None when the table is unknown)."""
+        rows = self._select(
+            "SELECT tbl_id, table_type, table_comment, location, input_format, partition_keys, last_modified "
+            "FROM tables WHERE db_name = ? AND table_name = ?",
+            (db_name, table_name),
+        )
+        if not rows:
+            return self._with_age(None)
+        tbl_id, type_, comment, location, fmt, pkeys, modified = rows[0]
+        columns = [
+            {"column_name": n, "column_type": t, "column_comment": c}
+            for n, t, c in self._select(
+                "SELECT column_name, column_type, column_comment FROM columns WHERE tbl_id = ? ORDER BY idx",
+                (tbl_id,),
+            )
+        ]
+        stats = self._select(
+            "SELECT COUNT(*), MAX(part_name), MAX(last_modified) FROM partitions WHERE tbl_id = ?",
+            (tbl_id,),
+        )[0]
+        return self._with_age({
+            "db_name": db_name,
+            "table_name": table_name,
+            "table_type": type_,
+            "table_comment": comment,
+            "location": location,
+            "input_format": fmt,
+            "last_modified": modified,
+            "columns": columns,
+            "partition_keys": json.loads(pkeys or "[]"),
+            "partition_count": stats[0],
+            "latest_partition": stats[1],
+            "partitions_last_modified": stats[2],
+        })
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Local metastore snapshot and search tools")
+    parser.add_argument("--db", default=DEFAULT_SNAPSHOT_PATH, help="snapshot SQLite file")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("refresh", help="incremental refresh from the metastore")
+    p.add_argument("--full", action="store_true", help="re-fetch every table")
+    p.add_argument("--config", help="connections.yaml path")
+    sub.add_parser("import-export", help="build from a metastore export TSV").add_argument("export")
+    sub.add_parser("status", help="snapshot size and age")
+    sub.add_parser("search-table").add_argument("keyword")
+    p = sub.add_parser("search-comment")
+    p.add_argument("term")
+    p.add_argument("--scope", choices=SEARCH_SCOPES, default="all")
+    p = sub.add_parser("search-v2")
+    p.add_argument("terms", nargs="+")
+    p.add_argument("--scope", choices=SEARCH_SCOPES, default="all")
+    p.add_argument("--synonyms", default=DEFAULT_SYNONYM_PATH)
+    sub.add_parser("describe").add_argument("table", help="db.table")
+    args = parser.parse_args(argv)
+
+    snapshot = MetadataSnapshot(args.db)
+    if args.command == "refresh":
+        result = snapshot.refresh(MetastoreSource.from_config(args.config), full=args.full)
+    elif args.command == "import-export":
+        result = snapshot.import_export(args.export)
+    elif args.command == "status":
+        result = snapshot.status()
+    elif args.command == "search-table":
+        result = snapshot.search_table(args.keyword)
+    elif args.command == "search-comment":
+        result = snapshot.search_by_comment(args.term, args.scope)
+    elif args.command == "search-v2":
+        terms = args.terms
+        if len(terms) == 1:
+            terms = expand_terms(terms[0], load_synonyms(args.synonyms))
+        result = snapshot.search_by_comment_v2(terms, args.scope)
+    else:
+        db_name, _, table_name = args.table.partition(".")
+        result = snapshot.get_table_detail(db_name, table_name)
+    json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,7 @@
 #!/bin/bash
 # Run Hive SQL script with date parameter
 # Usage: ./run_hive.sh <sql_file> [date]
+# For date-range backfills use scripts/backfill_hive.py (parallel, resumable)
 
 set -e
 
@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+Offline performance linter for generated Hive / Doris ETL scripts.
+
+Reads the table definitions under sql/*/ddl/ and checks every other script
+under sql/ (or the files given) for patterns that have reached production as
+full scans or slow joins:
+
+    partition_without_dt   error    read of a PARTITIONED BY (dt ...) table without a dt predicate
+    join_type_mismatch     error    join columns of different type families (string vs numeric vs date)
+    join_expression_key    warning  join key wrapped in an expression, e.g. coalesce(a, b) = c;
+                                    blocks map-join / colocate join, precompute the key instead
+    join_non_key           warning  join column that is neither a Doris key/bucket column nor id-like
+    select_star_orc        warning  SELECT * over an ORC table (reads every column stripe)
+    doris_no_bucket_prune  warning  Doris query without an equality/IN predicate on the
+                                    DISTRIBUTED BY HASH column
+
+The parser is regex based: it strips comments and string literals, splits
+statements on ';' and resolves FROM/JOIN aliases. Every table occurrence is
+checked against the predicates of its own query block (the enclosing subquery
+or UNION branch), so reading the same table twice is checked twice. Pure DDL
+is skipped; the SELECT body of CREATE TABLE ... AS SELECT is linted. Tables
+without DDL in the tree are skipped rather than guessed.
+
+Usage:
+    python scripts/sql_lint.py [paths ...] [--ddl-glob 'sql/*/ddl/*.sql'] [--fail-on error|warning|never]
+
+Output is a JSON report on stdout; the exit code is 1 when a finding at or
+above ``--fail-on`` exists, so dw-dev-workflow can gate scripts on it.
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from dw_config import REPO_ROOT
+
+SEVERITY_ORDER = {"info": 0, "warning": 1, "error": 2}
+
+RULES = {
+    "partition_without_dt": "error",
+    "join_type_mismatch": "error",
+    "join_expression_key": "warning",
+    "join_non_key": "warning",
+    "select_star_orc": "warning",
+    "doris_no_bucket_prune": "warning",
+}
+
+_IDENT = r"[A-Za-z_][\w$]*"
+QUALIFIED_NAME = rf"(?:`?{_IDENT}`?\.)?`?{_IDENT}`?"
+_KEYWORDS = {
+    "on", "where", "group", "order", "limit", "left", "right", "inner", "outer", "full", "cross",
+    "join", "union", "select", "from", "lateral", "having", "cluster", "distribute", "sort", "as",
+    "insert", "overwrite", "into", "table", "partition", "semi", "anti", "window",
+}
+_COMPARISON_RE = re.compile(r"=|<|>|\b(?:between|in|like|rlike)\b", re.I)
+_CTAS_RE = re.compile(r"\s*create\s+(?:temporary\s+)?(?:external\s+)?table\b.*?\bas\s*\(?\s*(?:select|with)\b",
+                      re.I | re.S)
+_ID_LIKE_RE = re.compile(r"(^id$|_id$|_psid$|_code$|_no$|_key$|^dt$)", re.I)
+_JOIN_FUNC_RE = re.compile(
+    r"\b(coalesce|nvl|if|case|concat|concat_ws|cast|substr|substring|trim|upper|lower|"
+    r"regexp_replace|date_format|to_date|split)\s*\(", re.I
+)
+
+
+@dataclass
+class Column:
+    name: str
+    type: str
+
+
+@dataclass
+class TableDef:
+    name: str
+    engine: str
+    file: str
+    columns: Dict[str, Column] = field(default_factory=dict)
+    partition_columns: List[str] = field(default_factory=list)
+    stored_as: str = ""
+    key_columns: List[str] = field(default_factory=list)
+    hash_columns: List[str] = field(default_factory=list)
+
+    def column_type(self, name: str) -> Optional[str]:
+        col = self.columns.get(name.lower())
+        if col:
+            return col.type
+        return "string" if name.lower() in self.partition_columns else None
+
+
+@dataclass
+class TableRef:
+    alias: str
+    table: TableDef
+    pos: int
+    scope: Tuple[int, int]
+    predicates: str
+
+
+@dataclass
+class Finding:
+    file: str
+    line: int
+    rule: str
+    severity: str
+    message: str
+    table: str = ""
+
+
+def _blank(match: "re.Match") -> str:
+    return re.sub(r"[^\n]", " ", match.group(0))
+
+
+def strip_sql(text: str) -> str:
+    """Blank out comments and string literal bodies, keeping offsets/newlines."""
+    pattern = re.compile(r"--[^\n]*|/\*.*?\*/|'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"", re.S)
+
+    def repl(m: "re.Match") -> str:
+        s = m.group(0)
+        if s[0] in "'\"":
+            return s[0] + _blank(re.match(r".*", s[1:-1], re.S)) + s[-1]
+        return _blank(m)
+
+    return pattern.sub(repl, text)
+
+
+def split_statements(text: str) -> Iterable[Tuple[int, str]]:
+    """Yield (offset, statement) for each ';'-terminated statement."""
+    start = 0
+    for m in re.finditer(";", text):
+        yield start, text[start:m.start()]
+        start = m.end()
+    if text[start:].strip():
+        yield start, text[start:]
+
+
+def _paren_body(text: str, open_pos: int) -> str:
+    depth = 0
+    for i in range(open_pos, len(text)):
+        if text[i] == "(":
+            depth += 1
+        elif text[i] == ")":
+            depth -= 1
+            if depth == 0:
+                return text[open_pos + 1:i]
+    return text[open_pos + 1:]
+
+
+def _split_top_level(text: str) -> List[str]:
+    parts, depth, current = [], 0, []
+    for ch in text:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+    parts.append("".join(current))
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _names(text: str) -> List[str]:
+    return [n.strip("` ").lower() for n in text.split(",") if n.strip()]
+
+
+def parse_ddl(path: str, engine: str) -> List[TableDef]:
+    text = strip_sql(open(path, encoding="utf-8").read())
+    tables = []
+    for offset, stmt in split_statements(text):
+        m = re.search(rf"create\s+(?:external\s+)?table\s+(?:if\s+not\s+exists\s+)?({QUALIFIED_NAME})\s*\(", stmt, re.I)
+        if not m:
+            continue
+        table = TableDef(m.group(1).replace("`", "").lower(), engine, path)
+        body = _paren_body(stmt, m.end() - 1)
+        for col in _split_top_level(body):
+            parts = col.split()
+            if len(parts) >= 2 and parts[0].lower() not in ("primary", "key", "index", "unique", "constraint"):
+                table.columns[parts[0].strip("`").lower()] = Column(parts[0].strip("`").lower(), parts[1].lower())
+        rest = stmt[m.end() - 1 + len(body) + 2:]
+        pm = re.search(r"partitioned\s+by\s*\(", rest, re.I)
+        if pm:
+            table.partition_columns = [p.split()[0].strip("`").lower()
+                                       for p in _split_top_level(_paren_body(rest, pm.end() - 1))]
+        sm = re.search(r"stored\s+as\s+(\w+)", rest, re.I)
+        if sm:
+            table.stored_as = sm.group(1).lower()
+        km = re.search(r"(?:unique|aggregate|duplicate|primary)\s+key\s*\(([^)]*)\)", rest, re.I)
+        if km:
+            table.key_columns = _names(km.group(1))
+        hm = re.search(r"distributed\s+by\s+hash\s*\(([^)]*)\)", rest, re.I)
+        if hm:
+            table.hash_columns = _names(hm.group(1))
+        tables.append(table)
+    return tables
+
+
+class Catalog:
+    def __init__(self, tables: Iterable[TableDef]) -> None:
+        self.by_name: Dict[str, TableDef] = {}
+        self.by_short: Dict[str, List[TableDef]] = {}
+        for t in tables:
+            self.by_name[t.name] = t
+            self.by_short.setdefault(t.name.split(".")[-1], []).append(t)
+
+    def resolve(self, name: str, engine: str) -> Optional[TableDef]:
+        name = name.replace("`", "").lower()
+        if name in self.by_name:
+            return self.by_name[name]
+        candidates = self.by_short.get(name.split(".")[-1], [])
+        same_engine = [t for t in candidates if t.engine == engine]
+        return (same_engine or candidates or [None])[0]
+
+
+def _type_family(type_: str) -> str:
+    t = type_.lower()
+    if re.match(r"(tinyint|smallint|int|integer|bigint|largeint|decimal|numeric|float|double)", t):
+        return "numeric"
+    if re.match(r"(date|datetime|timestamp)", t):
+        return "date"
+    if re.match(r"(string|varchar|char|text)", t):
+        return "string"
+    return t
+
+
+class StatementLinter:
+    def __init__(self, catalog: Catalog, path: str, engine: str, text: str) -> None:
+        self.catalog = catalog
+        self.path = path
+        self.engine = engine
+        self.text = text
+        self.findings: List[Finding] = []
+
+    def _line(self, pos: int) -> int:
+        return self.text.count("\n", 0, pos) + 1
+
+    def _add(self, pos: int, rule: str, message: str, table: str = "") -> None:
+        finding = Finding(os.path.relpath(self.path, REPO_ROOT), self._line(pos), rule, RULES[rule], message, table)
+        if finding not in self.findings:
+            self.findings.append(finding)
+
+    def lint(self, offset: int, stmt: str) -> None:
+        cte_names = {m.group(1).lower() for m in re.finditer(rf"(?:with|,)\s*({_IDENT})\s+as\s*\(", stmt, re.I)}
+        subqueries = _subquery_spans(stmt)
+        refs: List[TableRef] = []
+        for m in re.finditer(rf"\b(from|join)\s+({QUALIFIED_NAME})(?:\s+(?:as\s+)?({_IDENT}))?", stmt, re.I):
+            name = m.group(2).replace("`", "").lower()
+            if name in cte_names:
+                continue
+            table = self.catalog.resolve(name, self.engine)
+            if table is None:
+                continue
+            alias = m.group(3)
+            alias = alias.lower() if alias and alias.lower() not in _KEYWORDS else name.split(".")[-1]
+            scope, block = _query_block(stmt, m.start(2), subqueries)
+            refs.append(TableRef(alias, table, offset + m.start(2), scope, _predicate_text(block)))
+        if not refs:
+            return
+        by_alias = {r.alias: (r.table, r.pos) for r in refs}
+        self._check_partitions(refs, offset, stmt)
+        self._check_select_star(by_alias, offset, stmt)
+        self._check_joins(by_alias, offset, stmt)
+        if self.engine == "doris":
+            self._check_bucket_prune(refs)
+
+    @staticmethod
+    def _column_pattern(ref: TableRef, column: str, single: bool) -> str:
+        prefix = rf"(?:\b{re.escape(ref.alias)}\.)" + ("?" if single else "")
+        return rf"{prefix}\b{re.escape(column)}\b"
+
+    def _predicate_on(self, ref: TableRef, column: str, single: bool, ops: str) -> bool:
+        """``column`` directly compared with one of ``ops`` (what bucket pruning needs)."""
+        pattern = self._column_pattern(ref, column, single)
+        return bool(re.search(rf"{pattern}\s*(?:{ops})", ref.predicates, re.I))
+
+    def _compared(self, ref: TableRef, column: str, single: bool) -> bool:
+        """``column`` appears anywhere in a comparison, e.g. ``substr(t.dt, 1, 7) = ...``."""
+        pattern = re.compile(self._column_pattern(ref, column, single), re.I)
+        return any(pattern.search(clause) and _COMPARISON_RE.search(clause)
+                   for clause in re.split(r"\b(?:and|or)\b", ref.predicates, flags=re.I))
+
+    @staticmethod
+    def _single(ref: TableRef, refs: Sequence[TableRef]) -> bool:
+        return sum(1 for r in refs if r.scope == ref.scope) == 1
+
+    def _check_partitions(self, refs: Sequence[TableRef], offset: int, stmt: str) -> None:
+        for ref in refs:
+            table = ref.table
+            if table.engine != "hive" or "dt" not in table.partition_columns:
+                continue
+            if _is_write_target(stmt, ref.pos - offset):
+                continue
+            if not self._compared(ref, "dt", self._single(ref, refs)):
+                self._add(ref.pos, "partition_without_dt",
+                          f"{table.name} is partitioned by dt but is read without a dt predicate "
+                          "(full partition scan)", table.name)
+
+    def _check_select_star(self, refs, offset: int, stmt: str) -> None:
+        for m in re.finditer(rf"\bselect\s+(?:distinct\s+)?(?:({_IDENT})\.)?\*", stmt, re.I):
+            targets = [refs[m.group(1).lower()]] if m.group(1) and m.group(1).lower() in refs else (
+                list(refs.values()) if not m.group(1) else [])
+            for table, _ in targets:
+                if table.stored_as == "orc":
+                    self._add(offset + m.start(), "select_star_orc",
+                              f"SELECT * over ORC table {table.name}; list the needed columns", table.name)
+
+    def _check_joins(self, refs, offset: int, stmt: str) -> None:
+        for m in re.finditer(
+            r"\bon\b(.*?)(?=\b(?:where|group|order|limit|union|join|left|right|inner|full|cross)\b|;|$)",
+            stmt, re.I | re.S,
+        ):
+            cond, pos = m.group(1), offset + m.start()
+            for eq in re.split(r"\band\b", cond, flags=re.I):
+                if "=" not in eq:
+                    continue
+                lhs, _, rhs = eq.partition("=")
+                if _JOIN_FUNC_RE.search(lhs) or _JOIN_FUNC_RE.search(rhs):
+                    self._add(pos, "join_expression_key",
+                              f"join key wrapped in an expression: '{' '.join(eq.split())}'; "
+                              "precompute the key column so map-join/colocation can apply")
+                    continue
+                left, right = _column_ref(lhs, refs), _column_ref(rhs, refs)
+                if not (left and right):
+                    continue
+                (lt, lc), (rt, rc) = left, right
+                ltype, rtype = lt.column_type(lc), rt.column_type(rc)
+                if ltype and rtype and _type_family(ltype) != _type_family(rtype):
+                    self._add(pos, "join_type_mismatch",
+                              f"{lt.name}.{lc} ({ltype}) joined to {rt.name}.{rc} ({rtype}); "
+                              "implicit cast prevents key matching and may drop rows")
+                for table, col in ((lt, lc), (rt, rc)):
+                    keys = table.key_columns + table.hash_columns
+                    if (keys and col not in keys) or (not keys and not _ID_LIKE_RE.search(col)):
+                        self._add(pos, "join_non_key",
+                                  f"join on {table.name}.{col}, which is not a key column; "
+                                  "confirm the join grain", table.name)
+
+    def _check_bucket_prune(self, refs: Sequence[TableRef]) -> None:
+        for ref in refs:
+            table = ref.table
+            if table.engine != "doris" or not table.hash_columns:
+                continue
+            single = self._single(ref, refs)
+            if not any(self._predicate_on(ref, c, single, r"=(?!=)|in\b") for c in table.hash_columns):
+                self._add(ref.pos, "doris_no_bucket_prune",
+                          f"no equality/IN predicate on bucket column(s) {', '.join(table.hash_columns)} "
+                          f"of {table.name}; every tablet is scanned", table.name)
+
+
+def _subquery_spans(stmt: str) -> List[Tuple[int, int]]:
+    """(open, close) offsets of parentheses whose body is a SELECT / WITH."""
+    spans, stack = [], []
+    for i, ch in enumerate(stmt):
+        if ch == "(":
+            stack.append(i)
+        elif ch == ")" and stack:
+            start = stack.pop()
+            if re.match(r"\s*(?:select|with)\b", stmt[start + 1:i], re.I):
+                spans.append((start, i))
+    return spans
+
+
+def _query_block(stmt: str, rel_pos: int, subqueries: Sequence[Tuple[int, int]]) -> Tuple[Tuple[int, int], str]:
+    """The query block around ``rel_pos``: innermost subquery, nested subqueries
+    blanked, cut to the UNION branch. Returns ((start, end), text)."""
+    start, end = 0, len(stmt)
+    for o, c in subqueries:
+        if o < rel_pos < c and o >= start:
+            start, end = o + 1, c
+    chars = list(stmt[start:end])
+    for o, c in subqueries:
+        if start <= o and c < end:
+            chars[o - start:c + 1 - start] = " " * (c + 1 - o)
+    block = "".join(chars)
+    cut_start, cut_end = 0, len(block)
+    for m in re.finditer(r"\bunion\b(?:\s+(?:all|distinct)\b)?", block, re.I):
+        if m.end() <= rel_pos - start:
+            cut_start = m.end()
+        elif m.start() >= rel_pos - start:
+            cut_end = m.start()
+            break
+    return (start + cut_start, start + cut_end), block[cut_start:cut_end]
+
+
+def _predicate_text(block: str) -> str:
+    return " ".join(m.group(1) for m in re.finditer(
+        r"\b(?:where|on|and|having)\b(.*?)(?=\b(?:group|order|limit|union|insert|join|left|right|inner|full)\b|$)",
+        block, re.I | re.S))
+
+
+def _is_write_target(stmt: str, rel_pos: int) -> bool:
+    head = stmt[:rel_pos]
+    return bool(re.search(r"\b(insert\s+(?:overwrite|into)\s+(?:table\s+)?|create\s+table\s+(?:if\s+not\s+exists\s+)?)$",
+                          head, re.I))
+
+
+def _column_ref(expr: str, refs) -> Optional[Tuple[TableDef, str]]:
+    m = re.fullmatch(rf"\s*(?:({_IDENT})\.)?({_IDENT})\s*", expr)
+    if not m:
+        return None
+    alias, col = (m.group(1) or "").lower(), m.group(2).lower()
+    if alias:
+        return (refs[alias][0], col) if alias in refs else None
+    owners = [t for t, _ in refs.values() if t.column_type(col)]
+    return (owners[0], col) if len(owners) == 1 else None
+
+
+def script_engine(path: str) -> str:
+    """Engine a script or DDL file targets, from its place in the tree (``sql/doris/...``)."""
+    return "doris" if f"{os.sep}doris{os.sep}" in os.path.abspath(path) else "hive"
+
+
+def lint_file(path: str, catalog: Catalog) -> List[Finding]:
+    engine = script_engine(path)
+    text = strip_sql(open(path, encoding="utf-8").read())
+    linter = StatementLinter(catalog, path, engine, text)
+    for offset, stmt in split_statements(text):
+        if re.match(r"\s*(create|drop|alter|set|use|add|msck)\b", stmt, re.I) and not _CTAS_RE.match(stmt):
+            continue
+        linter.lint(offset, stmt)
+    return linter.findings
+
+
+def load_catalog(ddl_glob: str) -> Catalog:
+    tables = []
+    for path in sorted(glob.glob(os.path.join(REPO_ROOT, ddl_glob))):
+        tables.extend(parse_ddl(path, script_engine(path)))
+    return Catalog(tables)
+
+
+def collect_scripts(paths: Sequence[str]) -> List[str]:
+    files = []
+    for p in paths or [os.path.join(REPO_ROOT, "sql")]:
+        if os.path.isdir(p):
+            for root, _, names in os.walk(p):
+                if os.path.basename(root) == "ddl":
+                    continue
+                files.extend(os.path.join(root, n) for n in names if n.endswith(".sql"))
+        else:
+            files.append(p)
+    return sorted(files)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Static performance checks for Hive/Doris ETL scripts")
+    parser.add_argument("paths", nargs="*", help="scripts or directories (default: sql/)")
+    parser.add_argument("--ddl-glob", default=os.path.join("sql", "*", "ddl", "*.sql"))
+    parser.add_argument("--fail-on", choices=("error", "warning", "never"), default="error")
+    args = parser.parse_args(argv)
+
+    catalog = load_catalog(args.ddl_glob)
+    scripts = collect_scripts(args.paths)
+    findings = [f for path in scripts for f in lint_file(path, catalog)]
+    report = {
+        "tables_known": len(catalog.by_name),
+        "files_checked": [os.path.relpath(p, REPO_ROOT) for p in scripts],
+        "summary": {s: sum(1 for f in findings if f.severity == s) for s in ("error", "warning")},
+        "findings": [asdict(f) for f in findings],
+    }
+    json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+    if args.fail_on == "never":
+        return 0
+    threshold = SEVERITY_ORDER[args.fail_on]
+    return 1 if any(SEVERITY_ORDER[f.severity] >= threshold for f in findings) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
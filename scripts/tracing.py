@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Per-tool latency tracing and Prometheus metrics for the metadata tools.
+
+A tool call (search_table, search_by_comment, search_existing_indicators, ...)
+opens a span; backend queries inside it (metastore snapshot, Hive/Impala/Doris,
+indicator registry MySQL) and named stages such as result ranking open child
+spans. Finished spans feed per-tool and per-engine call counters and latency
+histograms; backend queries slower than the threshold are logged with their
+SQL text. A tool called from inside another tool's span (also across threads
+via ``bind``) is recorded as a stage of the outer call, so each call is
+counted once.
+
+Everything is off unless enabled. When disabled, ``tool``/``backend``/``stage``
+return one shared no-op context manager and ``traced`` wrappers call straight
+through, so the cost is a flag check per call.
+
+Configuration (environment, read on import; or call ``configure``):
+    DW_TRACING=1               enable tracing and metrics
+    DW_SLOW_QUERY_MS=500       slow-query log threshold
+    DW_TRACE_FILE=path         append finished tool spans as JSON lines
+    DW_METRICS_FILE=path       write Prometheus text format at exit (and on dump_metrics())
+    DW_METRICS_PORT=9464       serve /metrics over HTTP from a daemon thread
+
+Usage:
+    python scripts/tracing.py render   # metrics of this (empty) process, for format checks
+"""
+
+import argparse
+import atexit
+import bisect
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("dw.tracing")
+
+DEFAULT_SLOW_QUERY_MS = 500.0
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SQL_LOG_LIMIT = 2000
+
+
+class _Config:
+    enabled = False
+    slow_query_ms = DEFAULT_SLOW_QUERY_MS
+    trace_file: Optional[str] = None
+    metrics_file: Optional[str] = None
+
+
+_config = _Config()
+_local = threading.local()
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    __slots__ = ("kind", "name", "engine", "sql", "attrs", "parent", "children", "start", "duration", "error")
+
+    def __init__(self, kind: str, name: str, engine: str = "", sql: str = "",
+                 parent: Optional["Span"] = None) -> None:
+        self.kind = kind
+        self.name = name
+        self.engine = engine
+        self.sql = sql
+        self.attrs: Dict = {}
+        self.parent = parent
+        self.children: List["Span"] = []
+        self.start = 0.0
+        self.duration = 0.0
+        self.error: Optional[str] = None
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    @property
+    def tool(self) -> str:
+        span = self
+        while span.parent is not None:
+            span = span.parent
+        return span.name if span.kind == "tool" else ""
+
+    def __enter__(self) -> "Span":
+        stack = _stack()
+        if self.parent is None and stack:
+            self.parent = stack[-1]
+        if self.parent is not None:
+            self.parent.children.append(self)
+            if self.kind == "tool":
+                self.kind = "stage"
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        stack = _stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        _record(self)
+        return False
+
+    def to_dict(self) -> Dict:
+        data = {"kind": self.kind, "name": self.name, "ms": round(self.duration * 1000, 3)}
+        if self.engine:
+            data["engine"] = self.engine
+        if self.sql:
+            data["sql"] = self.sql[:SQL_LOG_LIMIT]
+        if self.attrs:
+            data["attrs"] = self.attrs
+        if self.error:
+            data["error"] = self.error
+        if self.children:
+            data["children"] = [c.to_dict() for c in self.children]
+        return data
+
+
+def _stack() -> List[Span]:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+# -- metrics -----------------------------------------------------------------
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+
+class _Registry:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Tuple], float] = {}
+        self.histograms: Dict[Tuple[str, Tuple], _Histogram] = {}
+
+    def inc(self, name: str, labels: Tuple, value: float = 1.0) -> None:
+        with self.lock:
+            self.counters[(name, labels)] = self.counters.get((name, labels), 0.0) + value
+
+    def observe(self, name: str, labels: Tuple, seconds: float) -> None:
+        with self.lock:
+            hist = self.histograms.get((name, labels))
+            if hist is None:
+                hist = self.histograms[(name, labels)] = _Histogram()
+            hist.observe(seconds)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+_registry = _Registry()
+
+
+def reset_metrics() -> None:
+    """Drop all recorded counters and histograms."""
+    _registry.reset()
+
+
+_HELP = {
+    "dw_tool_calls_total": ("counter", "Metadata tool calls by tool and status."),
+    "dw_tool_duration_seconds": ("histogram", "Metadata tool call latency."),
+    "dw_backend_queries_total": ("counter", "Backend queries by engine, tool and status."),
+    "dw_backend_query_duration_seconds": ("histogram", "Backend query latency."),
+    "dw_slow_queries_total": ("counter", "Backend queries above the slow-query threshold."),
+    "dw_stage_duration_seconds": ("histogram", "Latency of named stages inside a tool call."),
+}
+
+
+def _record(span: Span) -> None:
+    status = "error" if span.error else "ok"
+    if span.kind == "tool":
+        _registry.inc("dw_tool_calls_total", (("tool", span.name), ("status", status)))
+        _registry.observe("dw_tool_duration_seconds", (("tool", span.name),), span.duration)
+        if _config.trace_file:
+            _write_trace(span)
+    elif span.kind == "backend":
+        labels = (("engine", span.engine), ("tool", span.tool))
+        _registry.inc("dw_backend_queries_total", labels + (("status", status),))
+        _registry.observe("dw_backend_query_duration_seconds", labels, span.duration)
+        if span.duration * 1000 >= _config.slow_query_ms:
+            _registry.inc("dw_slow_queries_total", labels)
+            logger.warning("slow query: engine=%s tool=%s %.1fms sql=%s", span.engine, span.tool,
+                           span.duration * 1000, " ".join(span.sql.split())[:SQL_LOG_LIMIT])
+    else:
+        _registry.observe("dw_stage_duration_seconds", (("stage", span.name), ("tool", span.tool)), span.duration)
+
+
+_trace_lock = threading.Lock()
+
+
+def _write_trace(span: Span) -> None:
+    line = json.dumps({"ts": time.time(), **span.to_dict()}, ensure_ascii=False, default=str)
+    with _trace_lock:
+        with open(_config.trace_file, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def _fmt_labels(labels: Tuple, extra: Tuple = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for k, v in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+def render_prometheus() -> str:
+    """Current metrics in the Prometheus text exposition format."""
+    with _registry.lock:
+        counters = dict(_registry.counters)
+        histograms = {k: (list(h.counts), h.total, h.count) for k, h in _registry.histograms.items()}
+    lines: List[str] = []
+    for metric, (kind, text) in _HELP.items():
+        lines.append(f"# HELP {metric} {text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        if kind == "counter":
+            for (name, labels), value in sorted(counters.items()):
+                if name == metric:
+                    lines.append(f"{metric}{_fmt_labels(labels)} {value:g}")
+        else:
+            for (name, labels), (counts, total, count) in sorted(histograms.items()):
+                if name != metric:
+                    continue
+                cumulative = 0
+                for bound, n in zip(BUCKETS + (float("inf"),), counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(f"{metric}_bucket{_fmt_labels(labels, (('le', le),))} {cumulative}")
+                lines.append(f"{metric}_sum{_fmt_labels(labels)} {total:.6f}")
+                lines.append(f"{metric}_count{_fmt_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def dump_metrics(path: Optional[str] = None) -> None:
+    """Write the metrics file atomically (``DW_METRICS_FILE`` by default)."""
+    path = path or _config.metrics_file
+    if not path:
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def serve_metrics(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve ``/metrics`` from a daemon thread; returns the server."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="dw-metrics", daemon=True).start()
+    return server
+
+
+# -- public API ----------------------------------------------------------------
+
+_dump_at_exit = False
+
+
+def configure(enabled: bool = True, slow_query_ms: Optional[float] = None, trace_file: Optional[str] = None,
+              metrics_file: Optional[str] = None, metrics_port: Optional[int] = None) -> None:
+    global _dump_at_exit
+    _config.enabled = enabled
+    if slow_query_ms is not None:
+        _config.slow_query_ms = slow_query_ms
+    _config.trace_file = trace_file
+    _config.metrics_file = metrics_file
+    if metrics_file and not _dump_at_exit:
+        # one hook for the process; it writes whichever metrics file is configured at exit
+        atexit.register(dump_metrics)
+        _dump_at_exit = True
+    if metrics_port:
+        serve_metrics(metrics_port)
+
+
+def configure_from_env() -> None:
+    if os.environ.get("DW_TRACING", "").lower() not in ("1", "true", "yes", "on"):
+        return
+    port = os.environ.get("DW_METRICS_PORT")
+    configure(
+        enabled=True,
+        slow_query_ms=float(os.environ.get("DW_SLOW_QUERY_MS", DEFAULT_SLOW_QUERY_MS)),
+        trace_file=os.environ.get("DW_TRACE_FILE"),
+        metrics_file=os.environ.get("DW_METRICS_FILE"),
+        metrics_port=int(port) if port else None,
+    )
+
+
+def enabled() -> bool:
+    return _config.enabled
+
+
+def tool(name: str):
+    """Span for one tool call."""
+    return Span("tool", name) if _config.enabled else _NOOP
+
+
+def backend(engine: str, sql: str = ""):
+    """Child span for one backend query; ``sql`` is kept for the slow-query log."""
+    return Span("backend", engine, engine=engine, sql=sql) if _config.enabled else _NOOP
+
+
+def stage(name: str):
+    """Child span for a named stage (ranking, result building, ...)."""
+    return Span("stage", name) if _config.enabled else _NOOP
+
+
+def current_span() -> Optional[Span]:
+    stack = getattr(_local, "stack", None)
+    return stack[-1] if stack else None
+
+
+def bind(fn: Callable) -> Callable:
+    """Carry the caller's current span into ``fn`` when it runs on another thread."""
+    parent = current_span() if _config.enabled else None
+    if parent is None:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        stack = _stack()
+        stack.append(parent)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            stack.remove(parent)
+
+    return wrapper
+
+
+def traced(name: str) -> Callable:
+    """Decorator opening a tool span named ``name`` around each call."""
+
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _config.enabled:
+                return fn(*args, **kwargs)
+            with Span("tool", name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+configure_from_env()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Tracing and metrics helpers for the metadata tools")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("render", help="print this (empty) process's metrics, for format checks")
+    args = parser.parse_args(argv)
+    if args.cmd == "render":
+        sys.stdout.write(render_prometheus())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
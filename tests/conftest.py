@@ -0,0 +1,39 @@
+import os
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+FAKES_DIR = os.path.join(TESTS_DIR, "fakes")
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), "scripts"))
+
+
+@pytest.fixture
+def fake_hive(tmp_path, monkeypatch):
+    """Point HIVE_BIN at tests/fakes/hive; returns a reader of its run log."""
+    state = tmp_path / "fake_hive_state"
+    state.mkdir()
+    log = tmp_path / "fake_hive.log"
+    monkeypatch.setenv("HIVE_BIN", os.path.join(FAKES_DIR, "hive"))
+    monkeypatch.setenv("FAKE_HIVE_STATE", str(state))
+    monkeypatch.setenv("FAKE_HIVE_LOG", str(log))
+
+    def runs():
+        """[(pid, sql basename, dt), ...] in execution order."""
+        if not log.exists():
+            return []
+        return [tuple(line.split(" ", 2)) for line in log.read_text().splitlines()]
+
+    return runs
+
+
+@pytest.fixture
+def traced_metrics():
+    """Enable tracing with empty metrics; returns a renderer of the Prometheus text."""
+    import tracing
+
+    tracing.configure(enabled=True)
+    tracing.reset_metrics()
+    yield tracing.render_prometheus
+    tracing.configure(enabled=False)
+    tracing.reset_metrics()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Stand-in Doris FE/BE for Stream Load tests.
+
+The FE answers ``PUT /api/<db>/<table>/_stream_load`` with a 307 redirect to
+the BE, which keeps label state like Doris does: a label that is VISIBLE or
+PRECOMMITTED cannot be reused, an ABORTED one can. ``two_phase_commit: true``
+loads stay PRECOMMITTED until ``PUT /api/<db>/_stream_load_2pc`` commits or
+aborts them. Only committed rows land in ``tables``.
+
+Failure injection (set on the instance):
+    fail_labels_once   label prefixes whose first load attempt returns "Fail"
+    fail_chunks        label prefixes that always fail
+    fail_commit_at     1-based number of the commit request that returns an error
+
+Run standalone for manual checks:
+    python tests/fakes/doris.py --port 18030   # prints the --fe-url to use
+"""
+
+import argparse
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeDoris:
+    def __init__(self, host: str = "127.0.0.1", fe_port: int = 0) -> None:
+        self.lock = threading.Lock()
+        self.labels = {}  # label -> {"status", "txn_id", "rows", "table"}
+        self.txns = {}  # txn_id -> label
+        self.tables = {}  # "db.table" -> [row bytes, ...] (committed rows)
+        self.requests = []
+        self.fail_labels_once = set()
+        self.fail_chunks = set()
+        self.fail_commit_at = None
+        self.commit_calls = 0
+        self._txn_ids = itertools.count(1000)
+        self.be = ThreadingHTTPServer((host, 0), self._handler(self._be))
+        self.fe = ThreadingHTTPServer((host, fe_port), self._handler(self._fe))
+
+    @property
+    def fe_url(self) -> str:
+        host, port = self.fe.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeDoris":
+        for server in (self.fe, self.be):
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        for server in (self.fe, self.be):
+            server.shutdown()
+            server.server_close()
+
+    def rows(self, table: str):
+        with self.lock:
+            return list(self.tables.get(table, []))
+
+    # -- HTTP --------------------------------------------------------------------
+
+    def _handler(self, route):
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_PUT(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                status, headers, payload = route(self.path, self.headers, body)
+                data = json.dumps(payload).encode() if payload is not None else b""
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def _fe(self, path, headers, body):
+        if path.endswith("/_stream_load_2pc"):
+            return self._be(path, headers, body)
+        host, port = self.be.server_address[:2]
+        return 307, {"Location": f"http://{host}:{port}{path}"}, None
+
+    def _be(self, path, headers, body):
+        parts = path.strip("/").split("/")
+        if parts[-1] == "_stream_load_2pc":
+            return 200, {}, self._finish(int(headers["txn_id"]), headers["txn_operation"])
+        table = f"{parts[1]}.{parts[2]}"
+        label = headers["label"]
+        with self.lock:
+            self.requests.append(label)
+            existing = self.labels.get(label)
+            if existing and existing["status"] != "ABORTED":
+                job = "FINISHED" if existing["status"] == "VISIBLE" else existing["status"]
+                return 200, {}, {"Status": "Label Already Exists", "ExistingJobStatus": job,
+                                 "Message": f"Label [{label}] has already been used"}
+            once = next((p for p in self.fail_labels_once if label.startswith(p)), None)
+            if once or any(label.startswith(p) for p in self.fail_chunks):
+                self.fail_labels_once.discard(once)
+                return 200, {}, {"Status": "Fail", "Message": "injected failure"}
+            txn_id = next(self._txn_ids)
+            rows = body.splitlines()
+            two_phase = headers.get("two_phase_commit") == "true"
+            self.labels[label] = {"status": "PRECOMMITTED" if two_phase else "VISIBLE",
+                                  "txn_id": txn_id, "rows": rows, "table": table}
+            self.txns[txn_id] = label
+            if not two_phase:
+                self.tables.setdefault(table, []).extend(rows)
+        time.sleep(0.01)
+        return 200, {}, {"Status": "Success", "TxnId": txn_id, "Label": label,
+                         "NumberLoadedRows": len(rows), "LoadBytes": len(body)}
+
+    def _finish(self, txn_id, operation):
+        with self.lock:
+            job = self.labels.get(self.txns.get(txn_id))
+            if job is None or job["status"] != "PRECOMMITTED":
+                return {"status": "Fail", "msg": f"transaction {txn_id} is not PRECOMMITTED"}
+            if operation == "commit":
+                self.commit_calls += 1
+                if self.commit_calls == self.fail_commit_at:
+                    return {"status": "Fail", "msg": "injected commit failure"}
+                job["status"] = "VISIBLE"
+                self.tables.setdefault(job["table"], []).extend(job["rows"])
+            else:
+                job["status"] = "ABORTED"
+            return {"status": "Success", "msg": f"transaction [{txn_id}] {operation} successfully."}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in Doris FE/BE for Stream Load")
+    parser.add_argument("--port", type=int, default=18030)
+    args = parser.parse_args()
+    fake = FakeDoris(fe_port=args.port).start()
+    print(f"--fe-url {fake.fe_url}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Stand-in for ``metadata_snapshot.MetastoreSource`` backed by plain dicts.
+
+Tables are added with ``add_table`` and changed through ``touch`` /
+``add_partition`` / ``drop_partition`` / ``drop_table``, each taking the
+DDL time to stamp. ``on_fetch`` (if set) is called with the requested ids
+before ``fetch`` reads anything, to simulate concurrent metastore writes
+during a long fetch. ``fetched`` records the ids of every ``fetch`` call.
+"""
+
+
+class FakeMetastore:
+    def __init__(self):
+        self.tables = {}  # tbl_id -> {"db", "name", "comment", "ddl", "columns", "partitions"}
+        self.fetched = []
+        self.on_fetch = None
+
+    def add_table(self, tbl_id, db, name, comment="", columns=(), ddl=1):
+        self.tables[tbl_id] = {"db": db, "name": name, "comment": comment, "ddl": ddl,
+                               "columns": list(columns), "partitions": {}}
+
+    def touch(self, tbl_id, ddl, comment=None):
+        table = self.tables[tbl_id]
+        table["ddl"] = ddl
+        if comment is not None:
+            table["comment"] = comment
+
+    def add_partition(self, tbl_id, part_name, ddl, num_rows=0):
+        self.tables[tbl_id]["partitions"][part_name] = (ddl, ddl, num_rows, num_rows * 10)
+
+    def drop_partition(self, tbl_id, part_name):
+        del self.tables[tbl_id]["partitions"][part_name]
+
+    def drop_table(self, tbl_id):
+        del self.tables[tbl_id]
+
+    # -- MetastoreSource interface --------------------------------------------
+
+    def max_ddl_time(self):
+        times = [t["ddl"] for t in self.tables.values()]
+        times += [p[1] for t in self.tables.values() for p in t["partitions"].values()]
+        return max(times, default=0)
+
+    def all_table_ids(self):
+        return set(self.tables)
+
+    def partition_counts(self):
+        return {i: len(t["partitions"]) for i, t in self.tables.items() if t["partitions"]}
+
+    def changed_table_ids(self, since):
+        return {i for i, t in self.tables.items()
+                if t["ddl"] >= since or any(p[1] >= since for p in t["partitions"].values())}
+
+    def fetch(self, tbl_ids):
+        if self.on_fetch:
+            self.on_fetch(tbl_ids)
+        self.fetched.append(sorted(tbl_ids))
+        data = {"tables": [], "columns": [], "partition_keys": [], "partitions": []}
+        for tbl_id in tbl_ids:
+            t = self.tables.get(tbl_id)
+            if t is None:
+                continue
+            # the table id doubles as its storage descriptor's column id
+            data["tables"].append((tbl_id, t["db"], t["name"], "MANAGED_TABLE", t["comment"], "", "",
+                                   tbl_id, t["ddl"]))
+            data["columns"].extend((tbl_id, idx, name, "string", comment)
+                                   for idx, (name, comment) in enumerate(t["columns"]))
+            if t["partitions"]:
+                data["partition_keys"].append((tbl_id, 0, "dt", "string", ""))
+            data["partitions"].extend((tbl_id, name, *p) for name, p in t["partitions"].items())
+        return data
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from backfill_hive import BackfillRunner, date_range
+
+DATES = date_range("2024-01-01", "2024-01-06")
+
+
+@pytest.fixture
+def sql_file(tmp_path):
+    path = tmp_path / "dws_example.sql"
+    path.write_text("INSERT OVERWRITE TABLE t PARTITION (dt='${hivevar:dt}') SELECT 1;\n")
+    return str(path)
+
+
+def make_runner(tmp_path, sql_file, **kwargs):
+    kwargs.setdefault("parallelism", 3)
+    kwargs.setdefault("retries", 1)
+    return BackfillRunner(sql_file, DATES, checkpoint=str(tmp_path / "checkpoint.json"),
+                          log_dir=str(tmp_path / "logs"), **kwargs)
+
+
+@pytest.mark.parametrize("session", ["hive", "cli"])
+def test_runs_every_date_in_parallel_sessions(tmp_path, sql_file, fake_hive, monkeypatch, session):
+    monkeypatch.setenv("FAKE_HIVE_SLEEP", "0.2")
+    summary = make_runner(tmp_path, sql_file, session=session).run()
+
+    assert summary["failed"] == []
+    assert summary["succeeded"] == len(DATES)
+    assert sorted(dt for _, _, dt in fake_hive()) == DATES
+    assert summary["wall_seconds"] < 0.2 * len(DATES)
+    if session == "hive":
+        # one long-lived session per worker, reused across dates
+        assert len({pid for pid, _, _ in fake_hive()}) == 3
+
+
+def test_failed_attempt_is_retried(tmp_path, sql_file, fake_hive, monkeypatch):
+    monkeypatch.setenv("FAKE_HIVE_FAIL_ONCE", "2024-01-02")
+    monkeypatch.setenv("FAKE_HIVE_CRASH_ONCE", "2024-01-04")
+    summary = make_runner(tmp_path, sql_file).run()
+
+    assert summary["failed"] == []
+    assert summary["partitions"]["2024-01-02"]["attempts"] == 2
+    assert summary["partitions"]["2024-01-04"]["attempts"] == 2
+    assert summary["partitions"]["2024-01-01"]["attempts"] == 1
+
+
+def test_resume_skips_finished_dates_and_keeps_their_records(tmp_path, sql_file, fake_hive, monkeypatch):
+    monkeypatch.setenv("FAKE_HIVE_FAIL", "2024-01-05")
+    first = make_runner(tmp_path, sql_file).run()
+    assert first["failed"] == ["2024-01-05"]
+    checkpoint = json.loads((tmp_path / "checkpoint.json").read_text())
+    assert "2024-01-05" not in checkpoint["done"]
+    runs_before = len(fake_hive())
+
+    monkeypatch.delenv("FAKE_HIVE_FAIL")
+    second = make_runner(tmp_path, sql_file).run()
+
+    assert [dt for _, _, dt in fake_hive()[runs_before:]] == ["2024-01-05"]
+    assert second["failed"] == []
+    assert second["skipped_from_checkpoint"] == [dt for dt in DATES if dt != "2024-01-05"]
+    assert sorted(second["partitions"]) == DATES
+    resumed = second["partitions"]["2024-01-01"]
+    assert resumed["from_checkpoint"] is True
+    assert resumed["seconds"] == first["partitions"]["2024-01-01"]["seconds"]
+    assert "from_checkpoint" not in second["partitions"]["2024-01-05"]
+
+
+def test_checkpoint_of_another_script_is_rejected(tmp_path, sql_file, fake_hive):
+    make_runner(tmp_path, sql_file).run()
+    other = tmp_path / "other.sql"
+    other.write_text("SELECT 1;\n")
+    with pytest.raises(ValueError):
+        make_runner(tmp_path, str(other))
@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from doris_stream_load import main, source_sql
+from fakes.doris import FakeDoris
+
+
+@pytest.fixture
+def doris():
+    fake = FakeDoris().start()
+    yield fake
+    fake.stop()
+
+
+@pytest.fixture
+def config(tmp_path):
+    path = tmp_path / "connections.yaml"
+    path.write_text("doris:\n  fe_host: unused\n  user: root\n  password: ''\n")
+    return str(path)
+
+
+def write_rows(path, start, count):
+    path.write_text("".join(f"{i}\tuser{i}\tu{i}@example.com\t2026-03-01 00:00:00\n"
+                            for i in range(start, start + count)))
+    return str(path)
+
+
+def load(capsys, doris, config, target, source, *extra):
+    code = main([target, "--file", source, "--fe-url", doris.fe_url, "--config", config,
+                 "--chunk-mb", "0.01", "--parallel", "3", "--retries", "1", *extra])
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["ok"] == (code == 0)
+    return summary
+
+
+def test_unique_load_and_rerun_of_same_content(tmp_path, capsys, doris, config):
+    source = write_rows(tmp_path / "rows.tsv", 0, 2000)
+    first = load(capsys, doris, config, "dw.dwd_user_unique", source)
+    assert first["ok"] and first["rows"] == 2000 and first["chunks"] > 3
+    assert len(doris.rows("dw.dwd_user_unique")) == 2000
+
+    again = load(capsys, doris, config, "dw.dwd_user_unique", source)
+    assert again["ok"]
+    assert again["already_loaded_chunks"] == again["chunks"]
+    assert again["rows"] == 0 and again["bytes"] == 0
+    assert len(doris.rows("dw.dwd_user_unique")) == 2000
+
+
+def test_new_content_under_same_path_is_loaded(tmp_path, capsys, doris, config):
+    source = tmp_path / "rows.tsv"
+    load(capsys, doris, config, "dw.dwd_user_unique", write_rows(source, 0, 1000))
+    second = load(capsys, doris, config, "dw.dwd_user_unique", write_rows(source, 1000, 1000))
+    assert second["ok"] and second["rows"] == 1000 and second["already_loaded_chunks"] == 0
+    assert len(doris.rows("dw.dwd_user_unique")) == 2000
+
+
+def test_two_phase_commit_all_or_nothing_on_chunk_failure(tmp_path, capsys, doris, config):
+    source = write_rows(tmp_path / "rows.tsv", 0, 2000)
+    doris.fail_chunks.add("x_000002_")
+    summary = load(capsys, doris, config, "dw.ods_log_detail", source, "--label-prefix", "x", "--retries", "0")
+    assert not summary["ok"] and not summary["partial_commit"]
+    assert summary["commit"]["aborted"] and summary["commit"]["committed"] == []
+    assert doris.rows("dw.ods_log_detail") == []
+
+    doris.fail_chunks.clear()
+    doris.fail_labels_once.add("x_000002_")
+    summary = load(capsys, doris, config, "dw.ods_log_detail", source, "--label-prefix", "x")
+    assert summary["ok"] and summary["commit"]["aborted"] == []
+    assert len(doris.rows("dw.ods_log_detail")) == 2000
+
+
+def test_failed_commit_aborts_the_rest_and_rerun_completes(tmp_path, capsys, doris, config):
+    source = write_rows(tmp_path / "rows.tsv", 0, 2000)
+    doris.fail_commit_at = 3
+    summary = load(capsys, doris, config, "dw.ods_log_detail", source)
+    assert not summary["ok"] and summary["partial_commit"]
+    committed, aborted = summary["commit"]["committed"], summary["commit"]["aborted"]
+    assert len(committed) == 2 and len(committed) + len(aborted) == summary["chunks"]
+    partial = len(doris.rows("dw.ods_log_detail"))
+    assert 0 < partial < 2000
+
+    rerun = load(capsys, doris, config, "dw.ods_log_detail", source)
+    assert rerun["ok"] and rerun["already_loaded_chunks"] == 2
+    assert rerun["rows"] == 2000 - partial
+    rows = doris.rows("dw.ods_log_detail")
+    assert len(rows) == len(set(rows)) == 2000
+
+
+class Args:
+    hive_partition = None
+    query = None
+
+
+def test_hive_sources_are_ordered_by_key_columns():
+    args = Args()
+    args.hive_partition = "ph_sac_dwd.t/dt=2026-03-01"
+    assert source_sql(args, ["user_id"]) == "SELECT * FROM ph_sac_dwd.t WHERE dt = '2026-03-01' ORDER BY user_id"
+    args = Args()
+    args.query = "select user_id, name from t;"
+    assert source_sql(args, ["user_id"]) == "SELECT * FROM (select user_id, name from t) src ORDER BY user_id"
+    assert source_sql(args) == "select user_id, name from t;"
+
+
+def test_hive_partition_requires_columns(capsys, config):
+    with pytest.raises(SystemExit) as exc:
+        main(["dw.dwd_user_unique", "--hive-partition", "ph_sac_dwd.t/dt=2026-03-01", "--config", config])
+    assert exc.value.code == 2
+    assert "--columns" in capsys.readouterr().err
@@ -0,0 +1,82 @@
+import pytest
+
+from engine_pool import EnginePools
+
+
+class FakeConnection:
+    """DESCRIBE of ``*.missing`` fails like a statement error; ``*.crash`` kills the session."""
+
+    def __init__(self, opened):
+        self.broken = False
+        self.closed = False
+        opened.append(self)
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.description = None
+
+    def execute(self, sql):
+        if self.conn.broken or sql.endswith(".crash"):
+            self.conn.broken = True
+            raise ConnectionError("session lost")
+        if sql.endswith(".missing"):
+            raise RuntimeError("Table not found")
+        self.description = [("col_name",)]
+
+    def fetchall(self):
+        return [("id",)]
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def opened():
+    return []
+
+
+@pytest.fixture
+def pools(opened):
+    pools = EnginePools(config={"hive": {"pool_size": 2}}, factories={"hive": lambda: FakeConnection(opened)})
+    yield pools
+    pools.close()
+
+
+def test_statement_error_keeps_the_session(pools, opened):
+    assert pools.describe_many("hive", ["db.missing"])["results"][0]["ok"] is False
+    assert pools.describe_many("hive", ["db.t1"])["results"][0]["ok"] is True
+    assert len(opened) == 1 and not opened[0].closed
+
+
+def test_failed_ping_discards_the_session(pools, opened):
+    assert pools.describe_many("hive", ["db.crash"])["results"][0]["ok"] is False
+    assert opened[0].closed
+    assert pools.describe_many("hive", ["db.t1"])["results"][0]["ok"] is True
+    assert len(opened) == 2
+
+
+def test_invalid_items_fail_alone_in_input_order(pools):
+    results = pools.describe_many("hive", ["db.t1", "db.t2; DROP", "db.missing"])["results"]
+    assert [(r["table"], r["ok"]) for r in results] == [("db.t1", True), ("db.t2; DROP", False), ("db.missing", False)]
+    assert results[1]["error"].startswith("ValueError") and results[1]["sql"] is None
+    results = pools.search_many("hive", "db", ["loan", "x'y"])["results"]
+    assert [(r["keyword"], r["ok"]) for r in results] == [("loan", True), ("x'y", False)]
+
+
+def test_each_batch_call_is_one_tool_span(pools, traced_metrics):
+    pools.describe_many("hive", ["db.t1", "db.t2"])
+    pools.search_many("hive", "db", ["loan"])
+    text = traced_metrics()
+
+    assert 'dw_tool_calls_total{tool="describe_many",status="ok"} 1' in text
+    assert 'dw_tool_calls_total{tool="search_many",status="ok"} 1' in text
+    assert 'dw_backend_queries_total{engine="hive",tool="describe_many",status="ok"} 2' in text
+    assert 'stage="describe_many"' not in text
@@ -0,0 +1,75 @@
+import pytest
+
+from etl_dag import FingerprintStore, IncrementalRunner, LineageGraph
+
+DT = "2024-01-01"
+
+
+class FakeSnapshot:
+    def __init__(self):
+        self.fingerprints = {"ods.src": {"num_rows": 10, "last_modified": 1},
+                             "dw.a": {"num_rows": 5, "last_modified": 1}}
+
+    def partition_fingerprint(self, table, part_name=None):
+        return self.fingerprints.get(table)
+
+
+@pytest.fixture
+def graph(tmp_path):
+    (tmp_path / "sql").mkdir()
+    (tmp_path / "sql" / "a.sql").write_text("INSERT OVERWRITE TABLE dw.a SELECT * FROM ods.src;\n")
+    (tmp_path / "sql" / "b.sql").write_text("INSERT OVERWRITE TABLE dw.b SELECT * FROM dw.a;\n")
+    return LineageGraph.from_tree(str(tmp_path / "sql"))
+
+
+def run(graph, tmp_path, snapshot, changed=()):
+    store = FingerprintStore(str(tmp_path / "state.json"))
+    return IncrementalRunner(graph, DT, snapshot, store, parallelism=2).run(list(changed))
+
+
+def names(scripts):
+    return sorted(s.rsplit("/", 1)[-1] for s in scripts)
+
+
+def test_input_rewritten_in_the_same_run_is_not_rerun_later(graph, tmp_path, fake_hive):
+    snapshot = FakeSnapshot()
+    assert names(run(graph, tmp_path, snapshot)["ran"]) == ["a.sql", "b.sql"]
+    # the snapshot refresh after the run picks up what a.sql wrote
+    snapshot.fingerprints["dw.a"] = {"num_rows": 7, "last_modified": 2}
+
+    for _ in range(2):
+        summary = run(graph, tmp_path, snapshot)
+        assert summary["ran"] == []
+        assert names(summary["skipped_unchanged"]) == ["a.sql", "b.sql"]
+
+    snapshot.fingerprints["ods.src"] = {"num_rows": 11, "last_modified": 3}
+    assert names(run(graph, tmp_path, snapshot)["ran"]) == ["a.sql", "b.sql"]
+    assert len(fake_hive()) == 4
+
+
+def test_state_write_failure_marks_script_failed(graph, tmp_path, fake_hive, monkeypatch):
+    def broken(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(FingerprintStore, "record", broken)
+    summary = run(graph, tmp_path, FakeSnapshot())
+
+    assert names(summary["failed"]) == ["a.sql"]
+    assert summary["scripts"][next(s for s in summary["scripts"] if s.endswith("b.sql"))]["status"] == \
+        "skipped_upstream_failed"
+
+
+def test_doris_scripts_are_not_sent_to_hive(tmp_path, fake_hive):
+    for engine, name, sql in [("hive", "a.sql", "INSERT OVERWRITE TABLE dw.a SELECT * FROM ods.src;\n"),
+                              ("doris", "c.sql", "INSERT INTO ads.c SELECT * FROM dw.a;\n")]:
+        (tmp_path / "sql" / engine).mkdir(parents=True, exist_ok=True)
+        (tmp_path / "sql" / engine / name).write_text(sql)
+    graph = LineageGraph.from_tree(str(tmp_path / "sql"))
+    assert {s.rsplit("/", 1)[-1]: io["engine"] for s, io in graph.scripts.items()} == \
+        {"a.sql": "hive", "c.sql": "doris"}
+
+    summary = run(graph, tmp_path, FakeSnapshot())
+    assert names(summary["ran"]) == ["a.sql"]
+    assert names(summary["skipped_engine"]) == ["c.sql"]
+    assert summary["failed"] == []
+    assert [sql for _, sql, _ in fake_hive()] == ["a.sql"]
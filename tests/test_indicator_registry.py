@@ -0,0 +1,54 @@
+import datetime
+
+from indicator_registry import IndicatorRegistry
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.result = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=()):
+        if sql.startswith("SELECT MAX(id)"):
+            self.result = [(len(self.rows), datetime.datetime(2026, 3, 1))]
+        else:
+            self.result = self.rows
+
+    def fetchall(self):
+        return self.result
+
+
+class FakeConn:
+    def __init__(self, rows):
+        self.rows = [r + (None,) for r in rows]  # updated_time
+
+    def cursor(self):
+        return FakeCursor(self.rows)
+
+    def commit(self):
+        pass
+
+
+# id, indicator_name, target_column, source_table, logic_desc, remarks
+ROWS = [
+    (1, "过件率", "pass_rate", "dm.t", "审批通过笔数/进件笔数", ""),
+    (2, "放款金额", "loan_amt", "dm.t", "sum(放款本金)", ""),
+    (3, "首逾金额", "fpd_amt", "dm.t", "首期逾期本金，比率见过件率", ""),
+]
+
+
+def test_search_ranks_name_matches_first():
+    results = IndicatorRegistry(FakeConn(ROWS)).search("放款金额")
+    assert [r["id"] for r in results] == [2, 3]
+
+
+def test_search_single_character():
+    registry = IndicatorRegistry(FakeConn(ROWS))
+    assert [r["id"] for r in registry.search("率")] == [1, 3]
+    assert registry.search("罚") == []
@@ -0,0 +1,74 @@
+import pytest
+
+from metadata_index import CommentIndex, decompose, expand_terms, load_synonyms
+
+SYNONYMS = {
+    "首逾": ["M1逾期", "首次逾期"],
+    "金额": ["金额", "余额", "合计"],
+    "过件率": ["审批通过率", "授信通过率"],
+}
+
+
+def row(db, table, column="", comment="", table_comment=""):
+    return {"db_name": db, "table_name": table, "table_comment": table_comment,
+            "column_name": column, "column_type": "string", "column_comment": comment}
+
+
+@pytest.fixture
+def index():
+    return CommentIndex.from_rows([
+        row("ph_sac_ods", "ods_sac_apply", "pass_rate", "过件率"),
+        row("ph_sac_ods", "ods_sac_apply", "apply_amt", "申请金额"),
+        row("ph_sac_dm", "dm_sac_overdue", "m1_amt", "M1逾期金额"),
+        row("ph_sac_dm", "dm_sac_overdue", "first_amt", "首次逾期金额"),
+        row("ph_sac_dwd", "dwd_sac_overdue", "m1_amt", "M1逾期金额"),
+        row("ph_sac_dws", "dws_sac_repay", "repay_amt", "还款金额"),
+    ])
+
+
+def comments(index, ids):
+    return sorted(index.docs[i].column_comment or index.docs[i].table_comment for i in ids)
+
+
+def test_lookup_matches_substrings_only(index):
+    assert comments(index, index.lookup("过件率")) == ["过件率"]
+    assert comments(index, index.lookup("逾期金额")) == ["M1逾期金额", "M1逾期金额", "首次逾期金额"]
+    # "期金" and "额逾" bigrams exist, but "金额逾期" appears nowhere
+    assert index.lookup("金额逾期") == []
+
+
+def test_lookup_single_character(index):
+    assert comments(index, index.lookup("率")) == ["过件率"]
+    assert len(index.lookup("额")) == 5
+    assert index.lookup("率") == index.lookup(" 率 ")
+    assert index.lookup("罚") == []
+
+
+def test_decompose_and_expand():
+    assert decompose("贷款首逾金额", SYNONYMS) == ["贷款", "首逾", "金额"]
+    assert expand_terms("过件率", SYNONYMS) == ["过件率", "审批通过率", "授信通过率"]
+    # low-discrimination units are kept but not expanded to "余额", "合计"
+    assert expand_terms("首逾金额", SYNONYMS) == ["首逾金额", "首逾", "M1逾期", "首次逾期", "金额"]
+
+
+def test_v2_ranks_routes_then_layer(index):
+    results = index.search_by_comment_v2(["M1逾期", "首次逾期", "金额"])
+    assert [r["table_name"] for r in results] == ["dm_sac_overdue", "dwd_sac_overdue"]
+    assert results[0]["route_hits"] == 2
+    assert results[0]["matched_terms"] == ["M1逾期", "金额", "首次逾期"]
+
+
+def test_v2_generic_terms_alone_still_search(index):
+    results = index.search_by_comment_v2(["金额"], limit=10)
+    assert [r["layer"] for r in results] == ["dm", "dws", "dwd", "ods"]
+
+
+def test_v2_scope(index):
+    assert index.search_by_comment_v2(["过件率"], search_scope="table") == []
+    with pytest.raises(ValueError):
+        index.search_by_comment_v2(["过件率"], search_scope="tables")
+
+
+def test_missing_synonym_file_warns(tmp_path, capsys):
+    assert load_synonyms(str(tmp_path / "synonym.yaml")) == {}
+    assert "synonym expansion disabled" in capsys.readouterr().err
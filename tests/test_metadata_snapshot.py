@@ -0,0 +1,71 @@
+import pytest
+
+from fakes.metastore import FakeMetastore
+from metadata_snapshot import MetadataSnapshot
+
+
+@pytest.fixture
+def metastore():
+    fake = FakeMetastore()
+    fake.add_table(1, "ph_sac_ods", "ods_sac_loan", "放款明细", [("loan_amt", "放款金额")], ddl=125)
+    fake.add_table(2, "ph_sac_dws", "dws_sac_repay", "还款汇总", [("repay_amt", "还款金额")], ddl=100)
+    fake.add_partition(2, "dt=2026-03-01", ddl=110, num_rows=5)
+    fake.add_partition(2, "dt=2026-03-02", ddl=120, num_rows=7)
+    return fake
+
+
+@pytest.fixture
+def snapshot(tmp_path, metastore):
+    snap = MetadataSnapshot(str(tmp_path / "snapshot.db"))
+    snap.refresh(metastore)
+    yield snap
+    snap.close()
+
+
+def test_full_refresh(snapshot, metastore):
+    status = snapshot.status()
+    assert (status["tables"], status["columns"], status["partitions"]) == (2, 2, 2)
+    assert status["watermark"] == 125
+    assert snapshot.partition_fingerprint("ph_sac_dws.dws_sac_repay", "dt=2026-03-02") == \
+        {"num_rows": 7, "last_modified": 120}
+    assert snapshot.refresh(metastore, full=True)["changed_tables"] == 2
+
+
+def test_incremental_refetches_changed_tables_only(snapshot, metastore):
+    metastore.touch(1, ddl=130, comment="放款明细表")
+    summary = snapshot.refresh(metastore)
+
+    assert summary["mode"] == "incremental"
+    assert metastore.fetched[-1] == [1]
+    assert snapshot.search_table("ods_sac_loan")["results"][0]["table_comment"] == "放款明细表"
+    assert snapshot.status()["watermark"] == 130
+
+
+def test_dropped_table_and_partition_are_pruned(snapshot, metastore):
+    metastore.drop_table(1)
+    metastore.drop_partition(2, "dt=2026-03-01")
+    summary = snapshot.refresh(metastore)
+
+    assert (summary["dropped_tables"], summary["repartitioned_tables"]) == (1, 1)
+    assert snapshot.search_table("ods_sac_loan")["results"] == []
+    assert snapshot.partition_fingerprint("ph_sac_dws.dws_sac_repay", "dt=2026-03-01") is None
+    assert snapshot.status()["partitions"] == 1
+
+
+def test_change_during_fetch_is_picked_up_next_time(snapshot, metastore):
+    metastore.touch(2, ddl=130)
+    snapshot.refresh(metastore)
+
+    def concurrent_writes(ids):
+        # table 1 changes after the id query, then table 2 gets a newer partition
+        metastore.on_fetch = None
+        metastore.touch(1, ddl=140, comment="放款明细表")
+        metastore.add_partition(2, "dt=2026-03-03", ddl=150)
+
+    metastore.on_fetch = concurrent_writes
+    assert snapshot.refresh(metastore)["watermark"] == 130
+    assert metastore.fetched[-1] == [2]
+
+    snapshot.refresh(metastore)
+    assert metastore.fetched[-1] == [1, 2]
+    assert snapshot.search_table("ods_sac_loan")["results"][0]["table_comment"] == "放款明细表"
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from sql_lint import lint_file, load_catalog
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return load_catalog(os.path.join("sql", "*", "ddl", "*.sql"))
+
+
+def lint(tmp_path, catalog, sql, engine="hive"):
+    path = tmp_path / engine / "script.sql"
+    path.parent.mkdir(exist_ok=True)
+    path.write_text(sql)
+    return [(f.line, f.rule) for f in lint_file(str(path), catalog)]
+
+
+def test_ctas_body_is_linted(tmp_path, catalog):
+    findings = lint(tmp_path, catalog,
+                    "CREATE TABLE tmp_x STORED AS ORC AS SELECT * FROM ods_example_table a "
+                    "JOIN ods_example_table b ON coalesce(a.id,b.id)=b.id;\n")
+    assert {rule for _, rule in findings} == {"partition_without_dt", "select_star_orc", "join_expression_key"}
+
+
+def test_pure_ddl_is_skipped(tmp_path, catalog):
+    assert lint(tmp_path, catalog, "CREATE TABLE IF NOT EXISTS x (id BIGINT) STORED AS ORC;\n") == []
+
+
+@pytest.mark.parametrize("predicate", [
+    "t.dt = '${dt}'",
+    "substr(t.dt, 1, 7) = '2024-01'",
+    "'${dt}' = t.dt",
+    "t.dt BETWEEN '2024-01-01' AND '2024-01-31'",
+    "t.dt IN ('2024-01-01', '2024-01-02')",
+])
+def test_dt_predicate_forms(tmp_path, catalog, predicate):
+    assert lint(tmp_path, catalog, f"SELECT id FROM ods_example_table t WHERE {predicate};\n") == []
+
+
+def test_unfiltered_subquery_scan_of_same_table(tmp_path, catalog):
+    sql = ("SELECT id FROM ods_example_table WHERE dt = '${dt}'\n"
+           "  AND id IN (SELECT id FROM ods_example_table);\n")
+    assert lint(tmp_path, catalog, sql) == [(2, "partition_without_dt")]
+    filtered = sql.replace("FROM ods_example_table)", "FROM ods_example_table WHERE dt = '${dt}')")
+    assert lint(tmp_path, catalog, filtered) == []
+
+
+def test_each_union_branch_needs_its_own_predicate(tmp_path, catalog):
+    sql = "SELECT id FROM ods_example_table WHERE dt = '1'\nUNION ALL\nSELECT id FROM ods_example_table;\n"
+    assert lint(tmp_path, catalog, sql) == [(3, "partition_without_dt")]
+
+
+def test_doris_bucket_prune_per_occurrence(tmp_path, catalog):
+    sql = ("SELECT user_id FROM dwd_user_unique WHERE user_id = 1\n"
+           "UNION ALL SELECT user_id FROM dwd_user_unique;\n")
+    assert lint(tmp_path, catalog, sql, engine="doris") == [(2, "doris_no_bucket_prune")]
@@ -0,0 +1,103 @@
+import atexit
+import re
+import threading
+
+import tracing
+
+
+def metric(text, line_prefix):
+    """Value of the exposition line starting with ``line_prefix`` (None if absent)."""
+    for line in text.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+@tracing.traced("outer_tool")
+def outer_tool():
+    with tracing.backend("hive", "SELECT 1"):
+        pass
+    return inner_tool()
+
+
+@tracing.traced("inner_tool")
+def inner_tool():
+    with tracing.stage("rank"):
+        return 42
+
+
+def test_render_prometheus_format(traced_metrics):
+    with tracing.tool('odd"name'):
+        with tracing.backend("doris", "SHOW TABLES"):
+            pass
+    text = traced_metrics()
+
+    assert "# TYPE dw_tool_calls_total counter" in text
+    assert "# TYPE dw_tool_duration_seconds histogram" in text
+    assert metric(text, r'dw_tool_calls_total{tool="odd\"name",status="ok"}') == 1
+    assert metric(text, r'dw_backend_queries_total{engine="doris",tool="odd\"name",status="ok"}') == 1
+    buckets = [float(v) for v in re.findall(r'^dw_backend_query_duration_seconds_bucket\{.*\} (\d+)$', text, re.M)]
+    assert len(buckets) == len(tracing.BUCKETS) + 1
+    assert buckets == sorted(buckets) and buckets[-1] == 1
+    assert 'le="+Inf"' in text
+    assert metric(text, 'dw_backend_query_duration_seconds_count{engine="doris",tool="odd\\"name"}') == 1
+
+
+def test_nested_tool_is_a_stage_of_the_outer_call(traced_metrics):
+    assert outer_tool() == 42
+    text = traced_metrics()
+
+    assert metric(text, 'dw_tool_calls_total{tool="outer_tool",status="ok"}') == 1
+    assert 'tool="inner_tool"' not in text
+    assert metric(text, 'dw_stage_duration_seconds_count{stage="inner_tool",tool="outer_tool"}') == 1
+    assert metric(text, 'dw_stage_duration_seconds_count{stage="rank",tool="outer_tool"}') == 1
+
+
+def test_bind_carries_the_span_into_worker_threads(traced_metrics):
+    with tracing.tool("fan_out") as span:
+        work = tracing.bind(lambda: outer_tool())
+        threads = [threading.Thread(target=work) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    text = traced_metrics()
+
+    assert [c.name for c in span.children] == ["outer_tool"] * 3
+    assert metric(text, 'dw_tool_calls_total{tool="fan_out",status="ok"}') == 1
+    assert metric(text, 'dw_backend_queries_total{engine="hive",tool="fan_out",status="ok"}') == 3
+    assert 'tool="outer_tool"' not in text
+
+
+def test_errors_are_counted(traced_metrics):
+    try:
+        with tracing.tool("failing"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    assert metric(traced_metrics(), 'dw_tool_calls_total{tool="failing",status="error"}') == 1
+
+
+def test_disabled_is_a_no_op():
+    tracing.reset_metrics()
+    assert not tracing.enabled()
+    assert tracing.tool("x") is tracing.backend("hive") is tracing.stage("y")
+    fn = lambda: 1
+    assert tracing.bind(fn) is fn
+    assert outer_tool() == 42
+    assert "dw_tool_calls_total{" not in tracing.render_prometheus()
+
+
+def test_configure_registers_one_exit_hook(tmp_path, monkeypatch):
+    hooks = []
+    monkeypatch.setattr(atexit, "register", lambda fn, *args: hooks.append((fn, args)))
+    monkeypatch.setattr(tracing, "_dump_at_exit", False)
+    try:
+        for name in ("a.prom", "b.prom", "c.prom"):
+            tracing.configure(enabled=True, metrics_file=str(tmp_path / name))
+        assert len(hooks) == 1
+        fn, args = hooks[0]
+        fn(*args)
+        assert (tmp_path / "c.prom").exists() and not (tmp_path / "a.prom").exists()
+    finally:
+        tracing.configure(enabled=False)